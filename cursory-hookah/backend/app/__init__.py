@@ -5,13 +5,15 @@ import os
 
 db = SQLAlchemy()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     
     # Configuration
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hookah_gear.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = 'your-secret-key-here'
+    if config:
+        app.config.update(config)
     
     # Initialize extensions
     CORS(app)
@@ -28,14 +30,37 @@ def create_app():
     app.register_blueprint(recommendations_bp, url_prefix='/api/recommendations')
     app.register_blueprint(scraper_bp, url_prefix='/api/scraper')
     
-    # Create database tables
+    # Create database tables and bring existing databases up to date
     with app.app_context():
+        from app.migrations import run_migrations
         db.create_all()
+        run_migrations()
         
         # Initialize sample data if database is empty
         from app.models.gear import Gear
         if Gear.query.count() == 0:
             from app.services.sample_data import initialize_sample_data
             initialize_sample_data()
-    
+        
+        # In-memory indexes and caches are rebuilt from this app's database on first use
+        from app.services.catalog import catalog_version
+        from app.services.compatibility_graph import compatibility_graph
+        from app.services.facets import facet_cache
+        from app.services.http_cache import response_cache
+        from app.services.recommendation_cache import recommendation_cache
+        from app.services.scoring import gear_scorer
+        from app.services.similarity import similarity_index
+        from app.services.tag_index import tag_index
+        compatibility_graph.invalidate()
+        gear_scorer.invalidate()
+        similarity_index.invalidate()
+        tag_index.invalidate()
+        recommendation_cache.clear()
+        facet_cache.clear()
+        response_cache.clear()
+        catalog_version.load()
+
+    # Notice catalog writes made by other processes before serving
+    app.before_request(catalog_version.refresh)
+
     return app 
\ No newline at end of file
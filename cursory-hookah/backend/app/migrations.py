@@ -0,0 +1,201 @@
+"""
+Schema migrations for databases created before a model change.
+
+``db.create_all()`` only creates missing tables; it never adds indexes or
+columns to tables that already exist. Each migration upgrades an existing
+database by one step and is recorded in the ``schema_migration`` table so
+it runs exactly once. Migrations must be idempotent, because a fresh
+database already has everything ``create_all()`` knows about.
+"""
+
+from datetime import datetime
+import logging
+from sqlalchemy import bindparam, inspect, select
+from sqlalchemy.orm import Session
+from app import db
+
+logger = logging.getLogger(__name__)
+
+schema_migration = db.Table(
+    'schema_migration',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(100), nullable=False),
+    db.Column('applied_at', db.DateTime, default=datetime.utcnow)
+)
+
+MIGRATIONS = []
+
+def migration(version):
+    """Register ``func(connection)`` as the migration with the given version"""
+    def register(func):
+        MIGRATIONS.append((version, func))
+        return func
+    return register
+
+def _create_indexes(connection, table, names):
+    indexes = {index.name: index for index in table.indexes}
+    for name in names:
+        indexes[name].create(connection, checkfirst=True)
+
+@migration(1)
+def add_gear_indexes(connection):
+    """Indexes for the gear listing filters, sort orders and scraper lookups"""
+    from app.models.gear import Gear
+    _create_indexes(connection, Gear.__table__, [
+        'ix_gear_category_price',
+        'ix_gear_brand_price',
+        'ix_gear_rating',
+        'ix_gear_price',
+        'ix_gear_category_rating',
+        'ix_gear_name_brand',
+    ])
+
+@migration(2)
+def add_gear_search_index(connection):
+    """FTS5 full-text index over gear text columns, kept in sync by triggers"""
+    if connection.dialect.name != 'sqlite':
+        return
+
+    # Start from scratch in case a previous gear table (and so its triggers)
+    # was dropped while the external-content index was left behind
+    for statement in [
+        'DROP TRIGGER IF EXISTS gear_fts_insert',
+        'DROP TRIGGER IF EXISTS gear_fts_delete',
+        'DROP TRIGGER IF EXISTS gear_fts_update',
+        'DROP TABLE IF EXISTS gear_fts',
+        """CREATE VIRTUAL TABLE gear_fts USING fts5(
+            name, brand, model, description,
+            content='gear', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )""",
+        # Rank name matches above brand, model and description matches
+        "INSERT INTO gear_fts(gear_fts, rank) VALUES('rank', 'bm25(10.0, 5.0, 3.0, 1.0)')",
+        """CREATE TRIGGER gear_fts_insert AFTER INSERT ON gear BEGIN
+            INSERT INTO gear_fts(rowid, name, brand, model, description)
+            VALUES (new.id, new.name, new.brand, new.model, new.description);
+        END""",
+        """CREATE TRIGGER gear_fts_delete AFTER DELETE ON gear BEGIN
+            INSERT INTO gear_fts(gear_fts, rowid, name, brand, model, description)
+            VALUES ('delete', old.id, old.name, old.brand, old.model, old.description);
+        END""",
+        """CREATE TRIGGER gear_fts_update AFTER UPDATE OF name, brand, model, description ON gear BEGIN
+            INSERT INTO gear_fts(gear_fts, rowid, name, brand, model, description)
+            VALUES ('delete', old.id, old.name, old.brand, old.model, old.description);
+            INSERT INTO gear_fts(rowid, name, brand, model, description)
+            VALUES (new.id, new.name, new.brand, new.model, new.description);
+        END""",
+        "INSERT INTO gear_fts(gear_fts) VALUES('rebuild')",
+    ]:
+        connection.exec_driver_sql(statement)
+
+@migration(3)
+def add_gear_json_cache(connection):
+    """Pre-encoded per-row JSON for the gear listing endpoints"""
+    from app.models.gear import Gear
+
+    columns = {column['name'] for column in inspect(connection).get_columns('gear')}
+    if 'json_cache' not in columns:
+        connection.exec_driver_sql('ALTER TABLE gear ADD COLUMN json_cache TEXT')
+
+    gear_table = Gear.__table__
+    fill = gear_table.update().where(gear_table.c.id == bindparam('gear_id')).values(
+        json_cache=bindparam('json'),
+        updated_at=bindparam('stored_updated_at')
+    )
+
+    session = Session(bind=connection)
+    try:
+        batch = []
+        for gear in session.query(Gear).filter(Gear.json_cache.is_(None)).yield_per(1000):
+            batch.append({'gear_id': gear.id, 'json': gear.to_json(), 'stored_updated_at': gear.updated_at})
+            if len(batch) == 1000:
+                connection.execute(fill, batch)
+                batch = []
+        if batch:
+            connection.execute(fill, batch)
+    finally:
+        session.close()
+
+@migration(4)
+def add_gear_tags(connection):
+    """Normalized gear_tag rows for the existing compatibility_tags"""
+    from app.models.gear import Gear, GearTag
+
+    GearTag.__table__.create(connection, checkfirst=True)
+    connection.execute(GearTag.__table__.delete())
+
+    rows = []
+    for gear_id, tags in connection.execute(select(Gear.id, Gear.compatibility_tags)):
+        rows.extend({'gear_id': gear_id, 'tag': tag} for tag in dict.fromkeys(tags or []))
+    if rows:
+        connection.execute(GearTag.__table__.insert(), rows)
+
+@migration(5)
+def add_user_gear_unique_index(connection):
+    """Unique (user_id, gear_id) index, keeping the oldest of any duplicate entries"""
+    from app.models.user import UserGear
+
+    connection.exec_driver_sql(
+        'DELETE FROM user_gear WHERE id NOT IN '
+        '(SELECT MIN(id) FROM user_gear GROUP BY user_id, gear_id)'
+    )
+    _create_indexes(connection, UserGear.__table__, ['ix_user_gear_user_gear'])
+
+@migration(6)
+def add_catalog_version(connection):
+    """Single-row catalog version, bumped by triggers on every gear and user_gear write"""
+    # The row outlives drop_all(), so versions keep increasing across
+    # resets; the epoch tells versions of different databases apart
+    for statement in [
+        """CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            epoch TEXT NOT NULL,
+            gear_version INTEGER NOT NULL DEFAULT 0,
+            collection_version INTEGER NOT NULL DEFAULT 0
+        )""",
+        "INSERT OR IGNORE INTO catalog_version (id, epoch) VALUES (1, lower(hex(randomblob(8))))",
+        'DROP TRIGGER IF EXISTS catalog_version_gear_insert',
+        'DROP TRIGGER IF EXISTS catalog_version_gear_update',
+        'DROP TRIGGER IF EXISTS catalog_version_gear_delete',
+        'DROP TRIGGER IF EXISTS catalog_version_user_gear_insert',
+        'DROP TRIGGER IF EXISTS catalog_version_user_gear_update',
+        'DROP TRIGGER IF EXISTS catalog_version_user_gear_delete',
+        *(f"""CREATE TRIGGER catalog_version_{table}_{operation} AFTER {operation.upper()} ON {table} BEGIN
+            UPDATE catalog_version SET {column} = {column} + 1 WHERE id = 1;
+        END""" for table, column in [('gear', 'gear_version'), ('user_gear', 'collection_version')]
+               for operation in ('insert', 'update', 'delete')),
+    ]:
+        connection.exec_driver_sql(statement)
+
+@migration(7)
+def add_gear_json_cache_trigger(connection):
+    """Clear json_cache when a gear row is updated without it"""
+    # The Gear mapper events refresh json_cache for ORM instances; bulk
+    # statements and other writers do not, so their rows are re-encoded
+    # from the columns (see gear_fragments) until saved through the ORM
+    for statement in [
+        'DROP TRIGGER IF EXISTS gear_json_cache_clear',
+        """CREATE TRIGGER gear_json_cache_clear AFTER UPDATE ON gear
+        WHEN new.json_cache IS NOT NULL AND new.json_cache IS old.json_cache BEGIN
+            UPDATE gear SET json_cache = NULL WHERE id = new.id;
+        END""",
+    ]:
+        connection.exec_driver_sql(statement)
+
+def run_migrations():
+    """Apply all pending migrations in version order, in one transaction"""
+    with db.engine.begin() as connection:
+        schema_migration.create(connection, checkfirst=True)
+        applied = set(connection.execute(select(schema_migration.c.version)).scalars())
+
+        for version, upgrade in sorted(MIGRATIONS, key=lambda item: item[0]):
+            if version in applied:
+                continue
+            logger.info(f"Applying migration {version}: {upgrade.__name__}")
+            upgrade(connection)
+            connection.execute(schema_migration.insert().values(
+                version=version,
+                name=upgrade.__name__,
+                applied_at=datetime.utcnow()
+            ))
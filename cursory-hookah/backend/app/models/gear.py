@@ -1,7 +1,25 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import get_history, set_committed_value
+import json
 
 class Gear(db.Model):
+    __table_args__ = (
+        # Listing filters: category/brand equality combined with price ranges
+        db.Index('ix_gear_category_price', 'category', 'price'),
+        db.Index('ix_gear_brand_price', 'brand', 'price'),
+        # Sort orders; SQLite appends the rowid (id) to every index, so these
+        # also serve the (rating, id) / (price, id) keyset pagination
+        db.Index('ix_gear_rating', 'rating'),
+        db.Index('ix_gear_price', 'price'),
+        # Category recommendations ordered by rating
+        db.Index('ix_gear_category_rating', 'category', 'rating'),
+        # Scraper upserts look products up by name and brand
+        db.Index('ix_gear_name_brand', 'name', 'brand'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     category = db.Column(db.String(50), nullable=False)  # hookah, bowl, hose, hmd, etc.
@@ -18,26 +36,104 @@ class Gear(db.Model):
     source_website = db.Column(db.String(100))  # Track which website the product came from
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Pre-encoded to_dict() JSON, regenerated whenever the row changes
+    json_cache = db.deferred(db.Column(db.Text))
+
+    # Field names exposed by the API, in serialization order
+    SERIALIZED_FIELDS = (
+        'id', 'name', 'category', 'brand', 'model', 'description', 'price',
+        'image_url', 'product_url', 'specifications', 'compatibility_tags',
+        'rating', 'review_count', 'source_website', 'created_at', 'updated_at'
+    )
+
+    def to_dict(self, fields=None):
+        """Serialize the gear item, optionally limited to the given field names.
 
-    def to_dict(self):
+        Only the requested attributes are touched, so columns deferred with
+        ``load_only`` are never loaded just to be serialized.
+        """
         return {
-            'id': self.id,
-            'name': self.name,
-            'category': self.category,
-            'brand': self.brand,
-            'model': self.model,
-            'description': self.description,
-            'price': self.price,
-            'image_url': self.image_url,
-            'product_url': self.product_url,
-            'specifications': self.specifications or {},
-            'compatibility_tags': self.compatibility_tags or [],
-            'rating': self.rating,
-            'review_count': self.review_count,
-            'source_website': self.source_website,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            field: self.serialize_value(field, getattr(self, field))
+            for field in (fields or self.SERIALIZED_FIELDS)
         }
 
+    def to_json(self):
+        """Encode the full to_dict() as compact JSON, as stored in json_cache"""
+        return json.dumps(self.to_dict(), sort_keys=True, separators=(',', ':'))
+
+    @staticmethod
+    def serialize_value(field, value):
+        """Convert a raw column value to its API representation"""
+        if field == 'specifications':
+            return value or {}
+        if field == 'compatibility_tags':
+            return value or []
+        if field in ('created_at', 'updated_at'):
+            return value.isoformat() if value else None
+        return value
+
     def __repr__(self):
-        return f'<Gear {self.brand} {self.name}>' 
\ No newline at end of file
+        return f'<Gear {self.brand} {self.name}>'
+
+class GearTag(db.Model):
+    """Normalized copy of Gear.compatibility_tags, one row per (gear, tag).
+
+    Kept in sync with the JSON column by the Gear mapper events below, so
+    tag overlap can be answered with indexed joins.
+    """
+    __tablename__ = 'gear_tag'
+    __table_args__ = (
+        # The primary key serves lookups by gear; this one lookups by tag
+        db.Index('ix_gear_tag_tag', 'tag', 'gear_id'),
+    )
+
+    gear_id = db.Column(db.Integer, db.ForeignKey('gear.id'), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)
+
+    def __repr__(self):
+        return f'<GearTag {self.gear_id} {self.tag}>'
+
+def _insert_gear_tags(connection, gear_id, tags):
+    if tags:
+        connection.execute(
+            GearTag.__table__.insert(),
+            [{'gear_id': gear_id, 'tag': tag} for tag in dict.fromkeys(tags)]
+        )
+
+def _delete_gear_tags(connection, gear_id):
+    connection.execute(GearTag.__table__.delete().where(GearTag.__table__.c.gear_id == gear_id))
+
+@event.listens_for(Gear, 'after_insert')
+def _sync_gear_tags_after_insert(mapper, connection, target):
+    _insert_gear_tags(connection, target.id, target.compatibility_tags)
+
+@event.listens_for(Gear, 'after_update')
+def _sync_gear_tags_after_update(mapper, connection, target):
+    if get_history(target, 'compatibility_tags').has_changes():
+        _delete_gear_tags(connection, target.id)
+        _insert_gear_tags(connection, target.id, target.compatibility_tags)
+
+@event.listens_for(Gear, 'after_delete')
+def _sync_gear_tags_after_delete(mapper, connection, target):
+    _delete_gear_tags(connection, target.id)
+
+@event.listens_for(Gear, 'after_insert')
+def _store_json_cache_after_insert(mapper, connection, target):
+    # The id and column defaults are only known once the row is inserted
+    json_cache = target.to_json()
+    connection.execute(
+        Gear.__table__.update()
+        .where(Gear.__table__.c.id == target.id)
+        # Pass updated_at through so its onupdate default does not fire
+        .values(json_cache=json_cache, updated_at=target.updated_at)
+    )
+    set_committed_value(target, 'json_cache', json_cache)
+
+@event.listens_for(Gear, 'before_update')
+def _refresh_json_cache_before_update(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and not session.is_modified(target, include_collections=False):
+        return
+    # Set updated_at ourselves so the cached JSON matches the stored row
+    target.updated_at = datetime.utcnow()
+    target.json_cache = target.to_json()
@@ -0,0 +1,23 @@
+from app import db
+from datetime import datetime
+
+class Recommendation(db.Model):
+    """A precomputed recommendation, one row per ranked gear item.
+
+    ``scope`` is empty for a user's main recommendations and holds the
+    category name for per-category ones. ``fingerprint`` identifies the
+    collection the row was computed for; rows whose fingerprint no longer
+    matches the user's collection are ignored.
+    """
+    __table_args__ = (
+        db.Index('ix_recommendation_user_scope', 'user_id', 'scope', 'position'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    scope = db.Column(db.String(50), nullable=False, default='')
+    position = db.Column(db.Integer, nullable=False)
+    gear_id = db.Column(db.Integer, db.ForeignKey('gear.id'), nullable=False)
+    type = db.Column(db.String(20), nullable=False)  # compatible, popular, category
+    fingerprint = db.Column(db.String(40), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
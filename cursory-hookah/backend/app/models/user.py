@@ -19,6 +19,11 @@ class User(db.Model):
         }
 
 class UserGear(db.Model):
+    __table_args__ = (
+        # One entry per item and user; also serves the per-user lookups
+        db.Index('ix_user_gear_user_gear', 'user_id', 'gear_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     gear_id = db.Column(db.Integer, db.ForeignKey('gear.id'), nullable=False)
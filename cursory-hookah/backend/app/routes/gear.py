@@ -1,38 +1,345 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import and_, or_
 from app.models.gear import Gear
+from app.services.facets import facet_cache
+from app.services.http_cache import catalog_cached
+from app.services.price_stats import price_stats
+from app.services.search import search_gear_ids
+from app.services.similarity import similarity_index
+from app.services.serialization import (
+    encode_columnar, encode_gear_list, gear_fragments, gear_list_payload, gear_load_options,
+    parse_fields, parse_format
+)
 from app import db
+import base64
+import json
 
 gear_bp = Blueprint('gear', __name__)
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+MAX_BATCH_IDS = 10000
+MAX_HISTOGRAM_BINS = 100
+DEFAULT_SIMILAR_LIMIT = 10
+MAX_SIMILAR_LIMIT = 50
+# Ids per IN query, well under SQLite's bound parameter limit
+BATCH_CHUNK_SIZE = 500
+
+# Sort key -> (column, descending). Ties are broken by id in the same direction.
+SORT_KEYS = {
+    'rating': (Gear.rating, True),
+    'price': (Gear.price, False),
+}
+
+def _encode_cursor(sort, value, gear_id):
+    """Encode the position after a row as an opaque cursor string"""
+    payload = json.dumps([sort, value, gear_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor, sort):
+    """Decode a cursor produced by _encode_cursor for the given sort key"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, gear_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if cursor_sort != sort or not isinstance(gear_id, int):
+        raise ValueError('Cursor does not match sort order')
+    return value, gear_id
+
+def _keyset_condition(column, descending, value, last_id):
+    """Filter for rows strictly after (value, last_id) in listing order.
+
+    SQLite sorts NULL before any value, so NULLs come first when ascending
+    and last when descending.
+    """
+    if descending:
+        if value is None:
+            return and_(column.is_(None), Gear.id < last_id)
+        return or_(column < value, and_(column == value, Gear.id < last_id), column.is_(None))
+    if value is None:
+        return or_(and_(column.is_(None), Gear.id > last_id), column.isnot(None))
+    return or_(column > value, and_(column == value, Gear.id > last_id))
+
+def _filtered_gear_query(args):
+    """Build the gear query for the listing filters in the request args"""
+    category = args.get('category')
+    brand = args.get('brand')
+    min_price = args.get('min_price', type=float)
+    max_price = args.get('max_price', type=float)
+
+    query = Gear.query
+
+    if category:
+        query = query.filter(Gear.category == category)
+    if brand:
+        query = query.filter(Gear.brand == brand)
+    if min_price is not None:
+        query = query.filter(Gear.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Gear.price <= max_price)
+
+    return query
+
+def _stream_gear(query, fields=None):
+    """Stream the query results as a JSON array, one row at a time"""
+    def generate():
+        count = 0
+        yield '{"data":['
+        if fields is None:
+            rows = query.with_entities(Gear.id, Gear.json_cache).yield_per(STREAM_BATCH_SIZE)
+            encoded = (gear_fragments([row])[0] for row in rows)
+        else:
+            rows = query.options(*gear_load_options(fields)).yield_per(STREAM_BATCH_SIZE)
+            encoded = (current_app.json.dumps(gear.to_dict(fields)) for gear in rows)
+        for fragment in encoded:
+            if count:
+                yield ','
+            yield fragment
+            count += 1
+        yield '],"count":%d,"success":true}' % count
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
 @gear_bp.route('/', methods=['GET'])
+@catalog_cached
 def get_all_gear():
-    """Get all available gear with optional filtering"""
+    """Get all available gear with optional filtering.
+
+    Pass ``limit`` and/or ``cursor`` for keyset pagination over ``sort``
+    (``rating`` or ``price``), or ``stream=1`` to stream the full result set.
+    ``fields`` limits the returned (and loaded) columns and
+    ``format=columnar`` returns one array per field instead of row objects.
+    """
     try:
-        # Get query parameters for filtering
-        category = request.args.get('category')
-        brand = request.args.get('brand')
-        min_price = request.args.get('min_price', type=float)
-        max_price = request.args.get('max_price', type=float)
-        
-        # Build query
-        query = Gear.query
-        
-        if category:
-            query = query.filter(Gear.category == category)
-        if brand:
-            query = query.filter(Gear.brand == brand)
-        if min_price is not None:
-            query = query.filter(Gear.price >= min_price)
-        if max_price is not None:
-            query = query.filter(Gear.price <= max_price)
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            response_format = parse_format(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        sort = request.args.get('sort', 'rating')
+        if sort not in SORT_KEYS:
+            return jsonify({
+                'success': False,
+                'error': f"sort must be one of: {', '.join(SORT_KEYS)}"
+            }), 400
+
+        column, descending = SORT_KEYS[sort]
+        query = _filtered_gear_query(request.args)
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                value, last_id = _decode_cursor(cursor, sort)
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 400
+            query = query.filter(_keyset_condition(column, descending, value, last_id))
+
+        if descending:
+            query = query.order_by(column.desc(), Gear.id.desc())
+        else:
+            query = query.order_by(column.asc(), Gear.id.asc())
+
+        if request.args.get('stream', type=int):
+            if response_format == 'columnar':
+                return jsonify({
+                    'success': False,
+                    'error': 'format=columnar cannot be streamed'
+                }), 400
+            return _stream_gear(query, fields)
+
+        limit = request.args.get('limit', type=int)
+        paginated = limit is not None or bool(cursor)
+        if paginated:
+            limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+            # Fetch one extra row to know whether another page exists
+            query = query.limit(limit + 1)
+
+        # Rows are (id, sort value, payload), where the payload is the
+        # column values, the pre-encoded JSON or a Gear instance
+        if response_format == 'columnar':
+            names = fields or Gear.SERIALIZED_FIELDS
+            columns = [getattr(Gear, name) for name in names]
+            rows = [(row[0], row[1], row[2:]) for row in query.with_entities(Gear.id, column, *columns)]
+        elif fields is None:
+            rows = query.with_entities(Gear.id, column, Gear.json_cache).all()
+        else:
+            query = query.options(*gear_load_options(fields, column))
+            rows = [(gear.id, getattr(gear, column.key), gear) for gear in query]
+
+        extra = {}
+        if paginated:
+            # Unpaginated listings omit next_cursor, as existing clients expect
+            extra['next_cursor'] = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                extra['next_cursor'] = _encode_cursor(sort, rows[-1][1], rows[-1][0])
+
+        if response_format == 'columnar':
+            return jsonify({
+                'success': True,
+                **encode_columnar(names, [values for _, _, values in rows]),
+                **extra
+            }), 200
+
+        if fields is None:
+            body = encode_gear_list(gear_fragments([(gear_id, fragment) for gear_id, _, fragment in rows]), **extra)
+            return Response(body, mimetype='application/json'), 200
+
+        return jsonify({
+            'success': True,
+            'data': [gear.to_dict(fields) for _, _, gear in rows],
+            'count': len(rows),
+            **extra
+        }), 200
         
-        # Execute query
-        gear_list = query.all()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@gear_bp.route('/search', methods=['GET'])
+def search_gear():
+    """Full-text search over gear name, brand, model and description.
+
+    Every term in ``q`` is prefix-matched and results are ranked by BM25.
+    Page with ``limit`` and ``offset``; ``category`` and ``brand`` narrow
+    the results.
+    """
+    try:
+        q = request.args.get('q', '').strip()
+        if not q:
+            return jsonify({
+                'success': False,
+                'error': 'q is required'
+            }), 400
+
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+        offset = max(0, request.args.get('offset', 0, type=int))
+
+        # Fetch one extra id to know whether another page exists
+        gear_ids = search_gear_ids(
+            q,
+            category=request.args.get('category'),
+            brand=request.args.get('brand'),
+            limit=limit + 1,
+            offset=offset
+        )
+        next_offset = offset + limit if len(gear_ids) > limit else None
+        gear_ids = gear_ids[:limit]
+
+        if fields is None:
+            fragment_by_id = dict(
+                db.session.query(Gear.id, Gear.json_cache).filter(Gear.id.in_(gear_ids))
+            )
+            rows = [(gear_id, fragment_by_id[gear_id]) for gear_id in gear_ids if gear_id in fragment_by_id]
+            body = encode_gear_list(gear_fragments(rows), next_offset=next_offset)
+            return Response(body, mimetype='application/json'), 200
+
+        gear_by_id = {
+            gear.id: gear
+            for gear in Gear.query.options(*gear_load_options(fields)).filter(Gear.id.in_(gear_ids))
+        }
+        results = [gear_by_id[gear_id] for gear_id in gear_ids if gear_id in gear_by_id]
+
+        return jsonify({
+            'success': True,
+            'data': [gear.to_dict(fields) for gear in results],
+            'count': len(results),
+            'next_offset': next_offset
+        }), 200
         
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _parse_batch_ids():
+    """Read the requested gear ids from ``?ids=1,2,3`` or a JSON ``{"ids": [...]}`` body.
+
+    Duplicates are dropped, keeping the first occurrence.
+    """
+    if request.method == 'POST':
+        ids = (request.get_json(silent=True) or {}).get('ids')
+        if not isinstance(ids, list):
+            raise ValueError('ids must be a list of integers')
+    else:
+        ids = [value for value in request.args.get('ids', '').split(',') if value.strip()]
+
+    try:
+        ids = [int(value) for value in ids]
+    except (TypeError, ValueError):
+        raise ValueError('ids must be integers')
+
+    if not ids:
+        raise ValueError('ids is required')
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f'At most {MAX_BATCH_IDS} ids can be requested at once')
+
+    return list(dict.fromkeys(ids))
+
+@gear_bp.route('/batch', methods=['GET', 'POST'])
+@catalog_cached
+def get_gear_batch():
+    """Get several gear items by id in one request.
+
+    Results follow the requested order; ids that do not exist are listed
+    under ``missing``. Accepts the same ``fields`` and ``format`` options
+    as the listing.
+    """
+    try:
+        try:
+            gear_ids = _parse_batch_ids()
+            fields = parse_fields(request.args.get('fields'))
+            response_format = parse_format(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        # Payload per id: the pre-encoded JSON or a Gear instance
+        found = {}
+        for start in range(0, len(gear_ids), BATCH_CHUNK_SIZE):
+            chunk = gear_ids[start:start + BATCH_CHUNK_SIZE]
+            if fields is None and response_format == 'rows':
+                found.update(db.session.query(Gear.id, Gear.json_cache).filter(Gear.id.in_(chunk)))
+            else:
+                query = Gear.query.options(*gear_load_options(fields)).filter(Gear.id.in_(chunk))
+                found.update((gear.id, gear) for gear in query)
+
+        ordered_ids = [gear_id for gear_id in gear_ids if gear_id in found]
+        missing = [gear_id for gear_id in gear_ids if gear_id not in found]
+
+        if fields is None and response_format == 'rows':
+            body = encode_gear_list(
+                gear_fragments([(gear_id, found[gear_id]) for gear_id in ordered_ids]),
+                missing=missing
+            )
+            return Response(body, mimetype='application/json'), 200
+
         return jsonify({
             'success': True,
-            'data': [gear.to_dict() for gear in gear_list],
-            'count': len(gear_list)
+            **gear_list_payload([found[gear_id] for gear_id in ordered_ids], fields, response_format),
+            'missing': missing
         }), 200
         
     except Exception as e:
@@ -45,10 +352,68 @@ def get_all_gear():
 def get_gear_by_id(gear_id):
     """Get specific gear by ID"""
     try:
-        gear = Gear.query.get_or_404(gear_id)
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        gear = Gear.query.options(*gear_load_options(fields)).filter_by(id=gear_id).first_or_404()
         return jsonify({
             'success': True,
-            'data': gear.to_dict()
+            'data': gear.to_dict(fields)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@gear_bp.route('/<int:gear_id>/similar', methods=['GET'])
+@catalog_cached
+def get_similar_gear(gear_id):
+    """Get gear with similar names, descriptions and tags ("more like this")"""
+    try:
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            response_format = parse_format(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        limit = request.args.get('limit', DEFAULT_SIMILAR_LIMIT, type=int)
+        if limit < 1 or limit > MAX_SIMILAR_LIMIT:
+            return jsonify({
+                'success': False,
+                'error': f'limit must be between 1 and {MAX_SIMILAR_LIMIT}'
+            }), 400
+
+        if db.session.get(Gear, gear_id) is None:
+            return jsonify({
+                'success': False,
+                'error': 'Gear not found'
+            }), 404
+
+        # Candidates come from the LSH buckets shared with this gear
+        similar = similarity_index.similar(gear_id, limit)
+        gear_by_id = {
+            gear.id: gear
+            for gear in Gear.query.options(*gear_load_options(fields)).filter(
+                Gear.id.in_([similar_id for similar_id, _ in similar])
+            )
+        }
+        similar = [(similar_id, score) for similar_id, score in similar if similar_id in gear_by_id]
+
+        return jsonify({
+            'success': True,
+            **gear_list_payload([gear_by_id[similar_id] for similar_id, _ in similar], fields, response_format),
+            'similarity': [round(score, 4) for _, score in similar],
+            'gear_id': gear_id
         }), 200
         
     except Exception as e:
@@ -58,11 +423,11 @@ def get_gear_by_id(gear_id):
         }), 500
 
 @gear_bp.route('/categories', methods=['GET'])
+@catalog_cached
 def get_categories():
     """Get all available gear categories"""
     try:
-        categories = db.session.query(Gear.category).distinct().all()
-        category_list = [cat[0] for cat in categories]
+        category_list = [facet['name'] for facet in facet_cache.get()['categories']]
         
         return jsonify({
             'success': True,
@@ -76,11 +441,11 @@ def get_categories():
         }), 500
 
 @gear_bp.route('/brands', methods=['GET'])
+@catalog_cached
 def get_brands():
     """Get all available brands"""
     try:
-        brands = db.session.query(Gear.brand).distinct().all()
-        brand_list = [brand[0] for brand in brands]
+        brand_list = [facet['name'] for facet in facet_cache.get()['brands']]
         
         return jsonify({
             'success': True,
@@ -91,4 +456,51 @@ def get_brands():
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500 
\ No newline at end of file
+        }), 500
+
+@gear_bp.route('/facets', methods=['GET'])
+@catalog_cached
+def get_facets():
+    """Get categories, brands and source websites with counts and price ranges"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': facet_cache.get()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@gear_bp.route('/stats/price', methods=['GET'])
+@catalog_cached
+def get_price_stats():
+    """Get the price distribution per category for the price range slider.
+
+    Returns min/max/avg, percentiles and a ``bins``-bucket histogram for
+    every category, optionally narrowed by ``brand`` and ``category``.
+    """
+    try:
+        bins = request.args.get('bins', 10, type=int)
+        if not 1 <= bins <= MAX_HISTOGRAM_BINS:
+            return jsonify({
+                'success': False,
+                'error': f'bins must be between 1 and {MAX_HISTOGRAM_BINS}'
+            }), 400
+
+        return jsonify({
+            'success': True,
+            'data': price_stats(
+                brand=request.args.get('brand'),
+                category=request.args.get('category'),
+                bins=bins
+            )
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
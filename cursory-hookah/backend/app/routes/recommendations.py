@@ -1,78 +1,46 @@
 from flask import Blueprint, jsonify, request
-from app.models.gear import Gear
-from app.models.user import UserGear
-from app import db
-from sqlalchemy import and_
+from app.services.compatibility_graph import compatibility_graph
+from app.services.recommender import CategoryStrategy, fetch_gear, recommender, top_per_category, user_profile
+from app.services.serialization import gear_list_payload, parse_fields, parse_format
 
 recommendations_bp = Blueprint('recommendations', __name__)
 
+DEFAULT_CATEGORY_LIMIT = 10
+MAX_CATEGORY_LIMIT = 50
+
 @recommendations_bp.route('/', methods=['GET'])
 def get_recommendations():
     """Get compatible gear recommendations based on user's collection"""
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            response_format = parse_format(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
         # For MVP, we'll use a demo user ID
         demo_user_id = 1
         
-        # Get user's current gear
-        user_gear = UserGear.query.filter_by(user_id=demo_user_id).all()
-        user_gear_ids = [ug.gear_id for ug in user_gear]
-        
-        if not user_gear_ids:
-            # If user has no gear, return popular items
-            recommendations = Gear.query.order_by(Gear.rating.desc()).limit(10).all()
-            return jsonify({
-                'success': True,
-                'data': [gear.to_dict() for gear in recommendations],
-                'count': len(recommendations),
-                'type': 'popular'
-            }), 200
+        explain = request.args.get('explain', '').lower() == 'true'
         
-        # Get user's gear details
-        user_gear_items = Gear.query.filter(Gear.id.in_(user_gear_ids)).all()
-        
-        # Build compatibility tags from user's gear
-        user_compatibility_tags = set()
-        for gear in user_gear_items:
-            if gear.compatibility_tags:
-                user_compatibility_tags.update(gear.compatibility_tags)
-        
-        # Find compatible gear (gear that shares compatibility tags with user's gear)
-        compatible_gear = []
-        if user_compatibility_tags:
-            # Get all gear that has any of the user's compatibility tags
-            compatible_query = Gear.query.filter(
-                Gear.compatibility_tags.overlap(list(user_compatibility_tags))
-            ).filter(
-                ~Gear.id.in_(user_gear_ids)  # Exclude gear user already has
-            )
-            compatible_gear = compatible_query.order_by(Gear.rating.desc()).limit(20).all()
-        
-        # If not enough compatible gear, add popular items from different categories
-        if len(compatible_gear) < 10:
-            user_categories = {gear.category for gear in user_gear_items}
-            popular_gear = Gear.query.filter(
-                ~Gear.id.in_(user_gear_ids)
-            ).filter(
-                ~Gear.category.in_(user_categories)
-            ).order_by(Gear.rating.desc()).limit(10).all()
-            
-            compatible_gear.extend(popular_gear)
-        
-        # Remove duplicates and limit results
-        seen_ids = set()
-        unique_recommendations = []
-        for gear in compatible_gear:
-            if gear.id not in seen_ids and len(unique_recommendations) < 15:
-                unique_recommendations.append(gear)
-                seen_ids.add(gear.id)
+        # Compatible gear for the user's collection, or popular items if the
+        # collection is empty
+        result = recommender.recommend(demo_user_id, fields=fields, explain=explain)
         
-        return jsonify({
+        response = {
             'success': True,
-            'data': [gear.to_dict() for gear in unique_recommendations],
-            'count': len(unique_recommendations),
-            'type': 'compatible',
-            'user_gear_count': len(user_gear_ids)
-        }), 200
+            **gear_list_payload(result['gear'], fields, response_format),
+            'type': result['type']
+        }
+        if result['type'] == 'compatible':
+            response['user_gear_count'] = result['user_gear_count']
+        if explain:
+            response['explain'] = result['explain']
+        
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({
@@ -84,44 +52,131 @@ def get_recommendations():
 def get_category_recommendations(category):
     """Get recommendations for a specific category based on user's gear"""
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            response_format = parse_format(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
         # For MVP, we'll use a demo user ID
         demo_user_id = 1
         
-        # Get user's current gear
-        user_gear = UserGear.query.filter_by(user_id=demo_user_id).all()
-        user_gear_ids = [ug.gear_id for ug in user_gear]
+        explain = request.args.get('explain', '').lower() == 'true'
         
-        # Get user's gear details
-        user_gear_items = Gear.query.filter(Gear.id.in_(user_gear_ids)).all()
+        # Compatible gear in the specified category, excluding gear user already has
+        result = recommender.recommend(
+            demo_user_id, strategy=CategoryStrategy(category), fields=fields, explain=explain
+        )
         
-        # Build compatibility tags from user's gear
-        user_compatibility_tags = set()
-        for gear in user_gear_items:
-            if gear.compatibility_tags:
-                user_compatibility_tags.update(gear.compatibility_tags)
+        response = {
+            'success': True,
+            **gear_list_payload(result['gear'], fields, response_format),
+            'category': category
+        }
+        if explain:
+            response['explain'] = result['explain']
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500 
+
+@recommendations_bp.route('/by-category', methods=['GET'])
+def get_recommendations_by_category():
+    """Get the top ``limit`` recommendations for every category in one call"""
+    try:
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            response_format = parse_format(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        limit = request.args.get('limit', DEFAULT_CATEGORY_LIMIT, type=int)
+        if limit < 1 or limit > MAX_CATEGORY_LIMIT:
+            return jsonify({
+                'success': False,
+                'error': f'limit must be between 1 and {MAX_CATEGORY_LIMIT}'
+            }), 400
+
+        # For MVP, we'll use a demo user ID
+        demo_user_id = 1
         
-        # Find compatible gear in the specified category
-        query = Gear.query.filter(Gear.category == category)
+        # The user's tag profile comes from the in-memory index; every
+        # category is then ranked by a single window-function query
+        profile = user_profile(demo_user_id)
+        by_category = top_per_category(profile, limit, fields)
         
-        if user_compatibility_tags:
-            # Filter by compatibility tags
-            query = query.filter(Gear.compatibility_tags.overlap(list(user_compatibility_tags)))
+        return jsonify({
+            'success': True,
+            'categories': {
+                category: gear_list_payload(gear, fields, response_format)
+                for category, gear in by_category.items()
+            },
+            'count': len(by_category)
+        }), 200
         
-        # Exclude gear user already has
-        query = query.filter(~Gear.id.in_(user_gear_ids))
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@recommendations_bp.route('/bundle', methods=['GET'])
+def get_bundle():
+    """Get the best-rated compatible setup (hookah, bowl, HMD, hose) within a budget"""
+    try:
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            response_format = parse_format(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        budget = request.args.get('budget', type=float)
+        if budget is None or budget <= 0:
+            return jsonify({
+                'success': False,
+                'error': 'budget must be a positive number'
+            }), 400
+
+        # For MVP, we'll use a demo user ID
+        demo_user_id = 1
         
-        # Order by rating and limit results
-        recommendations = query.order_by(Gear.rating.desc()).limit(10).all()
+        # Gear the user already owns stays in the setup; only missing
+        # categories are filled
+        bundle = compatibility_graph.best_bundle(budget, user_profile(demo_user_id).gear_ids)
+        if bundle is None:
+            return jsonify({
+                'success': True,
+                'data': [],
+                'count': 0,
+                'budget': budget,
+                'message': 'No compatible setup fits this budget'
+            }), 200
         
+        gear_ids, total_price, explored = bundle
         return jsonify({
             'success': True,
-            'data': [gear.to_dict() for gear in recommendations],
-            'count': len(recommendations),
-            'category': category
+            **gear_list_payload(fetch_gear(gear_ids, fields), fields, response_format),
+            'budget': budget,
+            'total_price': total_price,
+            'explored': explored
         }), 200
         
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500 
\ No newline at end of file
+        }), 500
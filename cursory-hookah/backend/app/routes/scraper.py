@@ -1,53 +1,109 @@
-from flask import Blueprint, jsonify, request
-from app.services.scraper import HookahScraper
+from flask import Blueprint, current_app, jsonify, request
 from app.services.real_scrapers import RealHookahScraper
-from app import db
+from app.services.scrape_jobs import scrape_jobs
+from app.services.facets import facet_cache
 
 scraper_bp = Blueprint('scraper', __name__)
 
 @scraper_bp.route('/trigger', methods=['POST'])
 def trigger_scraping():
-    """Trigger product scraping from configured websites"""
+    """Queue product scraping from configured websites as a background job.
+
+    Returns 202 with the job; poll ``/jobs/<id>`` for its progress.
+    """
     try:
         data = request.get_json() or {}
         website = data.get('website', 'demo')  # Default to demo scraping
         category = data.get('category')
         max_pages = data.get('max_pages', 2)
         
-        if website == 'demo':
-            scraper = HookahScraper()
-            results = scraper.scrape_demo()
-            products_found = len(results.get('products', []))
-        else:
-            real_scraper = RealHookahScraper()
-            
-            if website == 'all':
-                # Scrape all websites
-                products = real_scraper.scrape_all_websites(
-                    categories=[category] if category else None,
-                    max_pages=max_pages
-                )
-            else:
-                # Scrape specific website
-                products = real_scraper.scrape_website(
-                    website, 
-                    category=category, 
-                    max_pages=max_pages
-                )
-            
-            # Save products to database
-            results = real_scraper.save_products_to_db(products)
-            products_found = results.get('added', 0) + results.get('updated', 0)
+        websites = ['demo', 'all', *RealHookahScraper().websites]
+        if website not in websites:
+            return jsonify({
+                'success': False,
+                'error': f"website must be one of: {', '.join(websites)}"
+            }), 400
+        if not isinstance(max_pages, int) or isinstance(max_pages, bool) or max_pages < 1:
+            return jsonify({
+                'success': False,
+                'error': 'max_pages must be a positive integer'
+            }), 400
+        
+        job = scrape_jobs.submit(current_app._get_current_object(), website, category, max_pages)
         
         return jsonify({
             'success': True,
-            'message': f'Scraping completed for {website}',
-            'data': {
-                'products_found': products_found,
-                'website': website,
-                'category': category,
-                'details': results
-            }
+            'message': f'Scraping queued for {website}',
+            'data': job.to_dict()
+        }), 202
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@scraper_bp.route('/jobs', methods=['GET'])
+def list_scrape_jobs():
+    """List recent scrape jobs, newest first"""
+    try:
+        jobs = [job.to_dict() for job in scrape_jobs.list()]
+        return jsonify({
+            'success': True,
+            'data': jobs,
+            'count': len(jobs)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@scraper_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_scrape_job(job_id):
+    """Get a scrape job's status and progress"""
+    try:
+        job = scrape_jobs.get(job_id)
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': 'Job not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': job.to_dict()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@scraper_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_scrape_job(job_id):
+    """Cancel a queued or crawling scrape job"""
+    try:
+        job = scrape_jobs.get(job_id)
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': 'Job not found'
+            }), 404
+        
+        if not job.cancel():
+            return jsonify({
+                'success': False,
+                'error': 'Job is already saving or finished',
+                'data': job.to_dict()
+            }), 409
+        
+        return jsonify({
+            'success': True,
+            'message': 'Cancellation requested',
+            'data': job.to_dict()
         }), 200
         
     except Exception as e:
@@ -60,21 +116,16 @@ def trigger_scraping():
 def get_scraping_status():
     """Get current scraping status and statistics"""
     try:
-        from app.models.gear import Gear
-        
         # Get basic statistics
-        total_products = Gear.query.count()
-        categories = db.session.query(Gear.category).distinct().all()
-        brands = db.session.query(Gear.brand).distinct().all()
-        websites = db.session.query(Gear.source_website).distinct().all()
+        facets = facet_cache.get()
         
         return jsonify({
             'success': True,
             'data': {
-                'total_products': total_products,
-                'categories': len(categories),
-                'brands': len(brands),
-                'websites': len(websites),
+                'total_products': facets['total'],
+                'categories': len(facets['categories']),
+                'brands': len(facets['brands']),
+                'websites': len(facets['websites']),
                 'last_updated': '2024-01-01'  # TODO: Add actual tracking
             }
         }), 200
@@ -1,10 +1,86 @@
-from flask import Blueprint, jsonify, request
+from datetime import datetime
+import json
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import joinedload
 from app.models.user import User, UserGear
 from app.models.gear import Gear
+from app.services.catalog import record_owned
+from app.services.recommendation_cache import recommendation_cache
+from app.services.serialization import gear_fragments
 from app import db
 
 user_bp = Blueprint('user', __name__)
 
+MAX_BULK_ITEMS = 10000
+# Ids or (name, brand) pairs per IN query, well under SQLite's bound parameter limit
+BULK_CHUNK_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+
+def _parse_bulk_items(items):
+    """Split bulk import items into gear ids and (name, brand) pairs.
+
+    An item is a gear id, or an object with a ``gear_id`` (as in the
+    export) or with a ``brand`` and ``name``.
+    """
+    gear_ids, pairs = [], []
+    for position, item in enumerate(items, 1):
+        if isinstance(item, dict) and 'gear_id' in item:
+            item = item['gear_id']
+        if isinstance(item, int) and not isinstance(item, bool):
+            gear_ids.append(item)
+        elif isinstance(item, dict) and isinstance(item.get('name'), str) and isinstance(item.get('brand'), str):
+            pairs.append((item['name'], item['brand']))
+        else:
+            raise ValueError(f'Item {position} must be a gear id or an object with brand and name')
+    return gear_ids, pairs
+
+def _read_bulk_items():
+    """Items from a JSON body (a list, or an object with ``items``) or NDJSON lines"""
+    if request.mimetype == 'application/x-ndjson':
+        lines = request.get_data(as_text=True).splitlines()
+        try:
+            return [json.loads(line) for line in lines if line.strip()]
+        except ValueError:
+            raise ValueError('Body must be one JSON value per line')
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('items')
+    if not isinstance(data, list):
+        raise ValueError('Body must be a list of items or an object with an items list')
+    return data
+
+def _resolve_gear(gear_ids, pairs):
+    """Map requested ids and (name, brand) pairs to existing gear ids.
+
+    Returns (gear ids, missing ids, missing pairs); a pair matching several
+    rows resolves to the oldest one.
+    """
+    found_ids = set()
+    unique_ids = list(dict.fromkeys(gear_ids))
+    for i in range(0, len(unique_ids), BULK_CHUNK_SIZE):
+        chunk = unique_ids[i:i + BULK_CHUNK_SIZE]
+        found_ids.update(db.session.execute(select(Gear.id).where(Gear.id.in_(chunk))).scalars())
+
+    by_pair = {}
+    unique_pairs = list(dict.fromkeys(pairs))
+    for i in range(0, len(unique_pairs), BULK_CHUNK_SIZE):
+        chunk = unique_pairs[i:i + BULK_CHUNK_SIZE]
+        rows = db.session.execute(
+            select(Gear.name, Gear.brand, db.func.min(Gear.id))
+            .where(tuple_(Gear.name, Gear.brand).in_(chunk))
+            .group_by(Gear.name, Gear.brand)
+        )
+        by_pair.update(((name, brand), gear_id) for name, brand, gear_id in rows)
+
+    resolved = [gear_id for gear_id in unique_ids if gear_id in found_ids]
+    resolved.extend(by_pair[pair] for pair in unique_pairs if pair in by_pair)
+    missing_ids = [gear_id for gear_id in unique_ids if gear_id not in found_ids]
+    missing_pairs = [{'name': name, 'brand': brand} for name, brand in unique_pairs if (name, brand) not in by_pair]
+    return list(dict.fromkeys(resolved)), missing_ids, missing_pairs
+
 @user_bp.route('/gear', methods=['GET'])
 def get_user_gear():
     """Get user's gear collection (for now, using a demo user)"""
@@ -12,8 +88,10 @@ def get_user_gear():
         # For MVP, we'll use a demo user ID
         demo_user_id = 1
         
-        # Get user's gear collection
-        user_gear = UserGear.query.filter_by(user_id=demo_user_id).all()
+        # Get user's gear collection, with the gear rows joined in
+        user_gear = UserGear.query.options(joinedload(UserGear.gear)).filter_by(
+            user_id=demo_user_id
+        ).order_by(UserGear.id).all()
         
         return jsonify({
             'success': True,
@@ -27,6 +105,60 @@ def get_user_gear():
             'error': str(e)
         }), 500
 
+def _collection_summary(user_id):
+    """Item count, total value and average rating, overall and per category.
+
+    Unpriced and unrated items count as items but not towards the value
+    or the average.
+    """
+    rows = db.session.query(
+        Gear.category,
+        db.func.count(),
+        db.func.sum(Gear.price),
+        db.func.sum(Gear.rating),
+        db.func.count(Gear.rating)
+    ).join(UserGear, UserGear.gear_id == Gear.id).filter(
+        UserGear.user_id == user_id
+    ).group_by(Gear.category).all()
+
+    def summarize(count, value, rating_sum, rated):
+        return {
+            'count': count,
+            'total_value': round(value or 0.0, 2),
+            'average_rating': round(rating_sum / rated, 2) if rated else None
+        }
+
+    summary = summarize(
+        sum(row[1] for row in rows),
+        sum(row[2] or 0.0 for row in rows),
+        sum(row[3] or 0.0 for row in rows),
+        sum(row[4] for row in rows)
+    )
+    summary['categories'] = {category: summarize(*totals) for category, *totals in rows}
+    return summary
+
+@user_bp.route('/gear/summary', methods=['GET'])
+def get_user_gear_summary():
+    """Get totals for user's gear collection without the items themselves"""
+    try:
+        # For MVP, we'll use a demo user ID
+        demo_user_id = 1
+
+        summary = recommendation_cache.get_or_compute(
+            demo_user_id, 'summary', lambda: _collection_summary(demo_user_id)
+        )
+
+        return jsonify({
+            'success': True,
+            'data': summary
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @user_bp.route('/gear', methods=['POST'])
 def add_gear_to_user():
     """Add gear to user's collection"""
@@ -43,30 +175,36 @@ def add_gear_to_user():
         # For MVP, we'll use a demo user ID
         demo_user_id = 1
         
-        # Check if gear exists
-        gear = Gear.query.get(gear_id)
-        if not gear:
-            return jsonify({
-                'success': False,
-                'error': 'Gear not found'
-            }), 404
-        
-        # Check if user already has this gear
-        existing_gear = UserGear.query.filter_by(
-            user_id=demo_user_id, 
-            gear_id=gear_id
+        # Insert only if the gear exists; the unique (user_id, gear_id)
+        # index turns a duplicate into no row instead of an error
+        added = db.session.execute(
+            insert(UserGear).from_select(
+                ['user_id', 'gear_id', 'added_at'],
+                select(
+                    db.literal(demo_user_id), Gear.id, db.literal(datetime.utcnow(), db.DateTime)
+                ).where(Gear.id == gear_id)
+            ).on_conflict_do_nothing(
+                index_elements=['user_id', 'gear_id']
+            ).returning(UserGear.id, UserGear.gear_id)
         ).first()
-        
-        if existing_gear:
+
+        if added is None:
+            db.session.rollback()
+            if db.session.get(Gear, gear_id) is None:
+                return jsonify({
+                    'success': False,
+                    'error': 'Gear not found'
+                }), 404
             return jsonify({
                 'success': False,
                 'error': 'Gear already in collection'
             }), 400
-        
-        # Add gear to user's collection
-        user_gear = UserGear(user_id=demo_user_id, gear_id=gear_id)
-        db.session.add(user_gear)
+
+        record_owned(db.session, added=[(demo_user_id, added.gear_id)])
         db.session.commit()
+        recommendation_cache.evict(demo_user_id)
+
+        user_gear = db.session.get(UserGear, added.id, options=[joinedload(UserGear.gear)])
         
         return jsonify({
             'success': True,
@@ -88,21 +226,24 @@ def remove_gear_from_user(gear_id):
         # For MVP, we'll use a demo user ID
         demo_user_id = 1
         
-        # Find the user gear entry
-        user_gear = UserGear.query.filter_by(
-            user_id=demo_user_id, 
-            gear_id=gear_id
-        ).first()
+        # Remove from collection
+        removed = db.session.execute(
+            delete(UserGear).where(
+                UserGear.user_id == demo_user_id,
+                UserGear.gear_id == gear_id
+            ).returning(UserGear.id)
+        ).scalar()
         
-        if not user_gear:
+        if removed is None:
+            db.session.rollback()
             return jsonify({
                 'success': False,
                 'error': 'Gear not found in collection'
             }), 404
         
-        # Remove from collection
-        db.session.delete(user_gear)
+        record_owned(db.session, removed=[(demo_user_id, gear_id)])
         db.session.commit()
+        recommendation_cache.evict(demo_user_id)
         
         return jsonify({
             'success': True,
@@ -114,4 +255,99 @@ def remove_gear_from_user(gear_id):
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500 
\ No newline at end of file
+        }), 500
+
+@user_bp.route('/gear/bulk', methods=['POST'])
+def bulk_add_gear_to_user():
+    """Add many items to user's collection in one transaction.
+
+    Accepts a JSON list (or ``{"items": [...]}``), or ``application/x-ndjson``
+    with one item per line, such as the export below. Items are gear ids,
+    ``{"gear_id": ...}`` or ``{"brand": ..., "name": ...}``. Items already
+    in the collection are skipped; unknown ones are reported back.
+    """
+    try:
+        try:
+            items = _read_bulk_items()
+            if len(items) > MAX_BULK_ITEMS:
+                raise ValueError(f'At most {MAX_BULK_ITEMS} items can be added at once')
+            gear_ids, pairs = _parse_bulk_items(items)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        # For MVP, we'll use a demo user ID
+        demo_user_id = 1
+
+        resolved, missing_ids, missing_pairs = _resolve_gear(gear_ids, pairs)
+
+        added = []
+        if resolved:
+            now = datetime.utcnow()
+            added = db.session.execute(
+                insert(UserGear).on_conflict_do_nothing(
+                    index_elements=['user_id', 'gear_id']
+                ).returning(UserGear.gear_id),
+                [{'user_id': demo_user_id, 'gear_id': gear_id, 'added_at': now} for gear_id in resolved]
+            ).scalars().all()
+            record_owned(db.session, added=[(demo_user_id, gear_id) for gear_id in added])
+        db.session.commit()
+        if added:
+            recommendation_cache.evict(demo_user_id)
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'added': len(added),
+                'already_owned': len(resolved) - len(added),
+                'not_found': {'gear_ids': missing_ids, 'items': missing_pairs}
+            },
+            'message': f'{len(added)} gear items added to collection'
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@user_bp.route('/gear/export', methods=['GET'])
+def export_user_gear():
+    """Stream user's gear collection as NDJSON, one entry with its gear per line"""
+    # For MVP, we'll use a demo user ID
+    demo_user_id = 1
+
+    query = db.session.query(
+        UserGear.id, UserGear.user_id, UserGear.gear_id, UserGear.added_at, Gear.json_cache
+    ).join(Gear, Gear.id == UserGear.gear_id).filter(
+        UserGear.user_id == demo_user_id
+    ).order_by(UserGear.id)
+
+    def encode(batch):
+        fragments = gear_fragments([(row.gear_id, row.json_cache) for row in batch])
+        for row, fragment in zip(batch, fragments):
+            entry = json.dumps({
+                'id': row.id,
+                'user_id': row.user_id,
+                'gear_id': row.gear_id,
+                'added_at': row.added_at.isoformat() if row.added_at else None
+            }, separators=(',', ':'))
+            yield entry[:-1] + ',"gear":' + fragment + '}\n'
+
+    def generate():
+        batch = []
+        for row in query.yield_per(EXPORT_BATCH_SIZE):
+            batch.append(row)
+            if len(batch) == EXPORT_BATCH_SIZE:
+                yield from encode(batch)
+                batch = []
+        yield from encode(batch)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename="collection.ndjson"'}
+    )
@@ -0,0 +1,89 @@
+"""
+Batch precomputation of recommendations for every user.
+
+Users are ranked in chunks against the in-memory tag index and scoring
+matrix, in this process by default. With several processes the chunks
+go to a spawned process pool whose workers each load a pickled snapshot
+of both indexes, so no worker inherits a lock held by another thread or
+needs the database. The results replace the contents of the
+``recommendation`` table in one transaction.
+"""
+
+import logging
+import multiprocessing
+from sqlalchemy import delete, insert
+from app import db
+from app.models.recommendation import Recommendation
+from app.services.recommender import CategoryStrategy, collection_fingerprint, recommender, user_profile
+from app.services.scoring import gear_scorer
+from app.services.tag_index import tag_index
+
+logger = logging.getLogger(__name__)
+
+# Users ranked per worker task
+CHUNK_SIZE = 200
+
+# Rows per INSERT statement
+INSERT_BATCH_SIZE = 5000
+
+def _load_snapshots(snapshots):
+    """Pool initializer: serve the parent's indexes in this worker"""
+    tag_index_snapshot, scorer_snapshot = snapshots
+    tag_index.load_snapshot(tag_index_snapshot)
+    gear_scorer.load_snapshot(scorer_snapshot)
+
+def _rank_users(task):
+    """Rank the main and per-category recommendations for a chunk of users"""
+    user_ids, categories = task
+    rows = []
+    for user_id in user_ids:
+        profile = user_profile(user_id)
+        if not profile.gear_ids:
+            continue
+        fingerprint = collection_fingerprint(profile.gear_ids)
+
+        scopes = [('', None)] + [(category, CategoryStrategy(category)) for category in categories]
+        for scope, strategy in scopes:
+            kind, gear_ids = recommender.rank(profile, strategy)
+            rows.extend({
+                'user_id': user_id,
+                'scope': scope,
+                'position': position,
+                'gear_id': gear_id,
+                'type': kind,
+                'fingerprint': fingerprint
+            } for position, gear_id in enumerate(gear_ids))
+    return rows
+
+def precompute_recommendations(processes=1):
+    """Recompute the ``recommendation`` table for every user with a collection.
+
+    With ``processes`` > 1, chunks of users are ranked in a pool of that
+    many spawned workers. Spawned workers re-import the ``__main__``
+    module, so only ask for them from scripts that are safe to import,
+    such as ``precompute_recommendations.py``. A single chunk always runs
+    in this process.
+    """
+    user_ids = tag_index.user_ids()
+    categories = tag_index.category_names()
+
+    tasks = [(user_ids[i:i + CHUNK_SIZE], categories) for i in range(0, len(user_ids), CHUNK_SIZE)]
+    if len(tasks) <= 1 or not processes or processes <= 1:
+        rows = [row for task in tasks for row in _rank_users(task)]
+    else:
+        snapshots = (tag_index.snapshot(), gear_scorer.snapshot())
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(min(processes, len(tasks)), initializer=_load_snapshots, initargs=(snapshots,)) as pool:
+            rows = [row for chunk in pool.imap_unordered(_rank_users, tasks) for row in chunk]
+
+    try:
+        db.session.execute(delete(Recommendation))
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            db.session.execute(insert(Recommendation), rows[i:i + INSERT_BATCH_SIZE])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f"Precomputed {len(rows)} recommendations for {len(user_ids)} users")
+    return {'users': len(user_ids), 'recommendations': len(rows)}
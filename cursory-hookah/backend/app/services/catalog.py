@@ -0,0 +1,233 @@
+"""
+Catalog change tracking.
+
+Triggers on ``gear`` and ``user_gear`` bump counters in the single
+``catalog_version`` row on every write, whichever process or statement
+made it. Caches of catalog-derived data key their entries by that
+version, so they never need to be invalidated by hand.
+
+In-memory indexes that need to know *what* changed register a listener
+with ``on_commit``; it receives a ``CatalogChanges`` describing the gear
+rows and user collection entries written by the committed session. When
+the version moved in a way this process cannot account for (a write from
+another process, or a bulk statement on ``gear``), the ``on_reset``
+listeners run instead and the indexes are rebuilt on next use.
+"""
+
+import logging
+import threading
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app import db
+from app.models.gear import Gear
+from app.models.user import UserGear
+
+logger = logging.getLogger(__name__)
+
+# Gear columns captured for listeners when a row is inserted or updated
+GEAR_SNAPSHOT_FIELDS = ('name', 'brand', 'description', 'category', 'rating', 'review_count', 'compatibility_tags')
+
+READ_VERSION = text('SELECT epoch, gear_version, collection_version FROM catalog_version WHERE id = 1')
+
+# A no-op write that takes SQLite's write lock before a session's first
+# catalog write, so no other writer can commit between the read and it
+LOCK_VERSION = text(
+    'UPDATE catalog_version SET gear_version = gear_version WHERE id = 1 '
+    'RETURNING epoch, gear_version, collection_version'
+)
+
+def _newer(state, known):
+    return state[0] != known[0] or state[1] > known[1] or state[2] > known[2]
+
+class CatalogVersion:
+    """Version of the gear catalog, read from the ``catalog_version`` row.
+
+    Each request starts with ``refresh``. Commits from this process are
+    accounted for as they happen; any other move of the row means the
+    in-memory indexes may be out of date, so they are reset. The version
+    string includes an epoch generated with the row, so versions (and the
+    ETags derived from them) from another database never match.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._known = None   # (epoch, gear version, collection version)
+
+    @property
+    def value(self):
+        if self._known is None:
+            self.refresh()
+        epoch, gear_version, _ = self._known
+        return f'{epoch}.{gear_version}'
+
+    def load(self):
+        """Adopt the database's current version; the caller resets the indexes itself"""
+        state = tuple(db.session.execute(READ_VERSION).one())
+        with self._lock:
+            self._known = state
+
+    def refresh(self):
+        """Read the version row and reset the indexes if another writer moved it"""
+        state = tuple(db.session.execute(READ_VERSION).one())
+        with self._lock:
+            known = self._known
+            moved = known is not None and _newer(state, known)
+            if known is None or moved:
+                self._known = state
+        if moved:
+            logger.info("Catalog changed outside this process; resetting in-memory indexes")
+            _reset()
+
+    def committed(self, base, final, bulk):
+        """Account for a commit of this process that moved the version from ``base`` to ``final``.
+
+        The listeners can apply the commit incrementally only if the
+        indexes were current when the session first wrote and every row
+        it wrote went through the flush; otherwise they are reset.
+        """
+        with self._lock:
+            known = self._known
+            incremental = not bulk and known is not None and base == known
+            if known is None or _newer(final, known):
+                self._known = final
+        if not incremental:
+            _reset()
+
+catalog_version = CatalogVersion()
+
+class CatalogChanges:
+    """Gear rows and collection entries written by one committed session"""
+
+    def __init__(self):
+        self.gear = {}               # gear id -> snapshot of GEAR_SNAPSHOT_FIELDS
+        self.deleted_gear = set()    # gear ids
+        self.owned_added = set()     # (user_id, gear_id)
+        self.owned_removed = set()   # (user_id, gear_id)
+
+    @property
+    def catalog_changed(self):
+        return bool(self.gear or self.deleted_gear)
+
+    @property
+    def collections_changed(self):
+        return bool(self.owned_added or self.owned_removed)
+
+    def __bool__(self):
+        return self.catalog_changed or self.collections_changed
+
+_listeners = []
+_reset_listeners = []
+
+def on_commit(listener):
+    """Call ``listener(changes)`` after every commit that changed the catalog or a collection"""
+    _listeners.append(listener)
+    return listener
+
+def on_reset(listener):
+    """Call ``listener()`` when the catalog changed in ways ``on_commit`` listeners did not see"""
+    _reset_listeners.append(listener)
+    return listener
+
+def _reset():
+    for listener in _reset_listeners:
+        try:
+            listener()
+        except Exception as e:
+            logger.error(f"Catalog reset listener {listener.__name__} failed: {e}")
+
+def record_owned(session, added=(), removed=()):
+    """Report (user_id, gear_id) entries written with Core statements.
+
+    Core inserts and deletes bypass the flush listener, so callers using
+    them report the entries here; listeners see them after the commit.
+    """
+    changes = session.info.setdefault('catalog_changes', CatalogChanges())
+    for key in added:
+        changes.owned_added.add(key)
+        changes.owned_removed.discard(key)
+    for key in removed:
+        changes.owned_removed.add(key)
+        changes.owned_added.discard(key)
+
+def _begin_write(session):
+    """Lock the version row and note it, before the session's first catalog write"""
+    write = session.info.get('catalog_write')
+    if write is None:
+        base = tuple(session.connection().execute(LOCK_VERSION).one())
+        write = session.info['catalog_write'] = {'base': base, 'final': None, 'bulk': False}
+    return write
+
+def _snapshot(gear):
+    return {field: getattr(gear, field) for field in GEAR_SNAPSHOT_FIELDS}
+
+@event.listens_for(Session, 'before_flush')
+def _lock_version(session, flush_context, instances):
+    if any(isinstance(obj, (Gear, UserGear)) for obj in (*session.new, *session.dirty, *session.deleted)):
+        _begin_write(session)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_statement_writes(orm_execute_state):
+    # Insert, update and delete statements bypass the flush; rows written
+    # to gear this way are unknown to the listeners, collection entries
+    # are reported with record_owned
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement.table, 'name', None)
+    if table == Gear.__tablename__:
+        _begin_write(orm_execute_state.session)['bulk'] = True
+    elif table == UserGear.__tablename__:
+        _begin_write(orm_execute_state.session)
+
+@event.listens_for(Session, 'after_flush')
+def _record_changes(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state here, while the
+    # instances already carry their flushed values (and new primary keys)
+    changes = session.info.setdefault('catalog_changes', CatalogChanges())
+
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Gear):
+            changes.gear[obj.id] = _snapshot(obj)
+            changes.deleted_gear.discard(obj.id)
+        elif isinstance(obj, UserGear) and obj in session.new:
+            key = (obj.user_id, obj.gear_id)
+            changes.owned_added.add(key)
+            changes.owned_removed.discard(key)
+
+    for obj in session.deleted:
+        if isinstance(obj, Gear):
+            changes.gear.pop(obj.id, None)
+            changes.deleted_gear.add(obj.id)
+        elif isinstance(obj, UserGear):
+            key = (obj.user_id, obj.gear_id)
+            changes.owned_removed.add(key)
+            changes.owned_added.discard(key)
+
+@event.listens_for(Session, 'before_commit')
+def _read_final_version(session):
+    # Flush now rather than inside commit, so the version read here
+    # includes every write of the transaction
+    session.flush()
+    write = session.info.get('catalog_write')
+    if write is not None:
+        write['final'] = tuple(session.connection().execute(READ_VERSION).one())
+
+@event.listens_for(Session, 'after_commit')
+def _publish_changes(session):
+    write = session.info.pop('catalog_write', None)
+    changes = session.info.pop('catalog_changes', None)
+    if write is not None:
+        catalog_version.committed(write['base'], write['final'], write['bulk'])
+    if not changes:
+        return
+
+    for listener in _listeners:
+        try:
+            listener(changes)
+        except Exception as e:
+            # A broken index must not turn a committed write into an error
+            logger.error(f"Catalog listener {listener.__name__} failed: {e}")
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('catalog_write', None)
+    session.info.pop('catalog_changes', None)
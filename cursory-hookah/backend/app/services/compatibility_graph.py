@@ -0,0 +1,205 @@
+"""
+Compatibility graph over setup gear and "complete my setup" bundles.
+
+Nodes are the hookahs, bowls, HMDs and hoses in the catalog; two items of
+different categories are connected when they share a compatibility tag.
+Edges are stored through the tags, as one bitmap of nodes per tag, so a
+tag shared by thousands of items costs one bitmap instead of millions of
+pairs; a node's neighbours are the OR of its tags' bitmaps and are
+memoised per build.
+
+The graph is rebuilt after every scrape and lazily after any other
+catalog change.
+"""
+
+import threading
+from app import db
+from app.models.gear import Gear
+from app.services.catalog import on_commit, on_reset
+from app.services.tag_index import bitmap_from_ids, ids_from_bitmap
+
+# Categories of a full setup, in assembly order: every item must share a
+# tag with an item earlier in this order (or with one the user owns)
+SETUP_CATEGORIES = ('hookah', 'bowl', 'hmd', 'hose')
+
+class CompatibilityGraph:
+    """Setup gear nodes with tag-shared edges between categories"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._stale = True
+        self._reset()
+
+    def _reset(self):
+        self.nodes = {}          # gear id -> (category, price, rating, tags)
+        self.tags = {}           # tag -> bitmap of nodes
+        self.categories = {}     # category -> bitmap of nodes
+        self._neighbors = {}     # gear id -> bitmap, filled on demand
+
+    def rebuild(self):
+        """Reload the graph from the database"""
+        with self._lock:
+            rows = db.session.query(
+                Gear.id, Gear.category, Gear.price, Gear.rating, Gear.compatibility_tags
+            ).filter(Gear.category.in_(SETUP_CATEGORIES), Gear.price.isnot(None))
+            self._load(rows)
+
+    def _load(self, rows):
+        """Replace the graph with (id, category, price, rating, tags) rows"""
+        with self._lock:
+            self._reset()
+            tag_ids, category_ids = {}, {}
+            for gear_id, category, price, rating, tags in rows:
+                tags = tuple(dict.fromkeys(tags or []))
+                self.nodes[gear_id] = (category, price, rating or 0.0, tags)
+                category_ids.setdefault(category, []).append(gear_id)
+                for tag in tags:
+                    tag_ids.setdefault(tag, []).append(gear_id)
+            self.tags = {tag: bitmap_from_ids(ids) for tag, ids in tag_ids.items()}
+            self.categories = {category: bitmap_from_ids(ids) for category, ids in category_ids.items()}
+            self._stale = False
+
+    def _ensure_current(self):
+        if self._stale:
+            with self._lock:
+                if self._stale:
+                    self.rebuild()
+
+    def mark_stale(self, changes):
+        if changes.catalog_changed:
+            self._stale = True
+
+    def invalidate(self):
+        with self._lock:
+            self._reset()
+            self._stale = True
+
+    def neighbors(self, gear_id):
+        """Bitmap of nodes in other categories sharing a tag with ``gear_id``"""
+        bitmap = self._neighbors.get(gear_id)
+        if bitmap is None:
+            category, _, _, tags = self.nodes[gear_id]
+            bitmap = 0
+            for tag in tags:
+                bitmap |= self.tags.get(tag, 0)
+            bitmap &= ~self.categories.get(category, 0)
+            self._neighbors[gear_id] = bitmap
+        return bitmap
+
+    def best_bundle(self, budget, owned_ids=()):
+        """The highest-rated compatible setup within ``budget``.
+
+        Owned setup gear is kept and only the missing categories are
+        filled. Categories are searched depth-first in assembly order with
+        candidates best-rated first; a branch is cut as soon as it cannot
+        beat the best bundle found (its rating plus the best ratings left
+        in the remaining categories) or cannot be completed: some remaining
+        category has no item within the budget left (after the cheapest
+        items of the others) that is compatible with the bundle so far or
+        with any affordable item of the categories in between.
+
+        Returns (gear ids, total price, explored nodes), or None if no
+        compatible setup fits the budget.
+        """
+        self._ensure_current()
+        with self._lock:
+            owned = [gear_id for gear_id in owned_ids if gear_id in self.nodes]
+            owned_categories = {self.nodes[gear_id][0] for gear_id in owned}
+            order = [c for c in SETUP_CATEGORIES if c not in owned_categories]
+            if not order:
+                return [], 0.0, 0
+            if any(category not in self.categories for category in order):
+                return None
+
+            min_price = {c: min(self.nodes[i][1] for i in ids_from_bitmap(self.categories[c])) for c in order}
+            price_left = [sum(min_price[c] for c in order[i:]) for i in range(len(order) + 1)]
+            if price_left[0] > budget:
+                return None
+
+            # Per remaining category, the ids that fit in some bundle within
+            # the budget, best-rated first and cheapest first, the bounds,
+            # and the nodes those ids could make reachable
+            by_category, by_price, best_rating, reach = {}, {}, {}, {}
+            for category in order:
+                cap = budget - price_left[0] + min_price[category]
+                ids = [i for i in ids_from_bitmap(self.categories[category]) if self.nodes[i][1] <= cap]
+                by_category[category] = sorted(ids, key=lambda i: (-self.nodes[i][2], self.nodes[i][1], i))
+                by_price[category] = sorted(ids, key=lambda i: (self.nodes[i][1], i))
+                best_rating[category] = self.nodes[by_category[category][0]][2]
+                bitmap = 0
+                for tag in {tag for i in ids for tag in self.nodes[i][3]}:
+                    bitmap |= self.tags[tag]
+                reach[category] = _to_bytes(bitmap & ~self.categories[category])
+            rating_left = [sum(best_rating[c] for c in order[i:]) for i in range(len(order) + 1)]
+
+            reachable = 0
+            for gear_id in owned:
+                reachable |= self.neighbors(gear_id)
+
+            best = {'score': -1.0, 'price': 0.0, 'ids': None}
+            explored = 0
+
+            def completable(depth, reachable, spent):
+                """Whether every category from ``depth`` on can still be filled"""
+                reachable = [_to_bytes(reachable)] if reachable is not None else []
+                for category in order[depth:]:
+                    limit = budget - spent - price_left[depth] + min_price[category]
+                    for gear_id in by_price[category]:
+                        if self.nodes[gear_id][1] > limit:
+                            return False
+                        if not reachable or any(_has_bit(bitmap, gear_id) for bitmap in reachable):
+                            break
+                    else:
+                        return False
+                    reachable.append(reach[category])
+                return True
+
+            def search(depth, reachable, spent, score, chosen):
+                nonlocal explored
+                explored += 1
+                if depth == len(order):
+                    if score > best['score']:
+                        best.update(score=score, price=spent, ids=list(chosen))
+                    return
+
+                category = order[depth]
+                allowed = self.categories[category]
+                if chosen or owned:
+                    allowed &= reachable
+                allowed = _to_bytes(allowed)
+                budget_left = budget - spent - price_left[depth + 1]
+                for gear_id in by_category[category]:
+                    _, price, rating, _ = self.nodes[gear_id]
+                    # Candidates are sorted by rating (cheapest first on ties),
+                    # so no later one can do better
+                    if score + rating + rating_left[depth + 1] <= best['score']:
+                        break
+                    if price > budget_left:
+                        continue
+                    if not _has_bit(allowed, gear_id):
+                        continue
+                    next_reachable = reachable | self.neighbors(gear_id)
+                    if not completable(depth + 1, next_reachable, spent + price):
+                        continue
+                    chosen.append(gear_id)
+                    search(depth + 1, next_reachable, spent + price, score + rating, chosen)
+                    chosen.pop()
+
+            # Without owned gear the first category is not constrained
+            if completable(0, reachable if owned else None, 0.0):
+                search(0, reachable, 0.0, 0.0, [])
+
+            if best['ids'] is None:
+                return None
+            return best['ids'], round(best['price'], 2), explored
+
+def _to_bytes(bitmap):
+    return bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+
+def _has_bit(bitmap_bytes, gear_id):
+    byte_index = gear_id >> 3
+    return byte_index < len(bitmap_bytes) and bitmap_bytes[byte_index] >> (gear_id & 7) & 1
+
+compatibility_graph = CompatibilityGraph()
+on_commit(compatibility_graph.mark_stale)
+on_reset(compatibility_graph.invalidate)
@@ -0,0 +1,64 @@
+import threading
+from sqlalchemy import func
+from app import db
+from app.models.gear import Gear
+from app.services.catalog import catalog_version
+
+def compute_facets():
+    """Compute category, brand and source website facets for the catalog"""
+    def facet_rows(column):
+        rows = db.session.query(
+            column,
+            func.count(Gear.id),
+            func.min(Gear.price),
+            func.max(Gear.price)
+        ).group_by(column).order_by(column).all()
+        return [{
+            'name': name,
+            'count': count,
+            'min_price': min_price,
+            'max_price': max_price
+        } for name, count, min_price, max_price in rows]
+
+    categories = facet_rows(Gear.category)
+    prices = [facet for facet in categories if facet['min_price'] is not None]
+
+    return {
+        'total': sum(facet['count'] for facet in categories),
+        'min_price': min((facet['min_price'] for facet in prices), default=None),
+        'max_price': max((facet['max_price'] for facet in prices), default=None),
+        'categories': categories,
+        'brands': facet_rows(Gear.brand),
+        'websites': facet_rows(Gear.source_website)
+    }
+
+class FacetCache:
+    """Catalog facets computed once per catalog version.
+
+    The first reader after a catalog write recomputes the facets with
+    grouped queries; every other request is served from memory instead of
+    scanning the table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entry = (None, None)
+
+    def get(self):
+        version = catalog_version.value
+        cached_version, facets = self._entry
+        if cached_version == version:
+            return facets
+
+        with self._lock:
+            cached_version, facets = self._entry
+            if cached_version != version:
+                facets = compute_facets()
+                self._entry = (version, facets)
+            return facets
+
+    def clear(self):
+        with self._lock:
+            self._entry = (None, None)
+
+facet_cache = FacetCache()
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import threading
+from flask import Response, current_app, request
+from app.services.catalog import catalog_version
+
+# Total size of the cached bodies, and the largest body worth caching:
+# a full catalog listing is rebuilt rather than pinned in memory
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+class ResponseCache:
+    """In-process LRU of rendered response bodies for one catalog version.
+
+    Entries from older catalog versions can never be served again, so
+    they are dropped as soon as a body for a newer version is stored.
+    Least recently used bodies are evicted once there are more than
+    ``max_entries`` or they total more than ``max_bytes``; bodies over
+    ``max_body_bytes`` are not cached at all.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=MAX_CACHE_BYTES, max_body_bytes=MAX_BODY_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_body_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (body, mimetype)
+        self._bytes = 0
+        self._version = None
+
+    def get(self, version, key):
+        with self._lock:
+            if version != self._version or key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, version, key, body, mimetype):
+        """Store a body; returns False if it is too large to cache"""
+        if len(body) > min(self.max_body_bytes, self.max_bytes):
+            return False
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[0])
+            self._entries[key] = (body, mimetype)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+response_cache = ResponseCache()
+
+def catalog_cached(view):
+    """Cache a GET view that only depends on the catalog and the query string.
+
+    The ETag is derived from the catalog version and the request, so a
+    matching ``If-None-Match`` is answered with 304 before the view (or the
+    database) is touched. Other 200 responses are served from the
+    rendered-body cache when possible.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET':
+            return view(*args, **kwargs)
+
+        version = catalog_version.value
+        key = (request.path, tuple(sorted(request.args.items(multi=True))))
+        etag = hashlib.sha1(repr((version, key)).encode()).hexdigest()
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            cached = response_cache.get(version, key)
+            if cached is not None:
+                body, mimetype = cached
+                response = Response(body, mimetype=mimetype)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                response_cache.put(version, key, response.get_data(), response.mimetype)
+
+        response.set_etag(etag)
+        # Let clients keep the body but revalidate it on every use
+        response.cache_control.no_cache = True
+        return response
+
+    return wrapper
@@ -0,0 +1,89 @@
+from sqlalchemy import case, func, select
+from app import db
+from app.models.gear import Gear
+
+PERCENTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+def _priced_gear(brand=None, category=None):
+    """Base selection of gear rows that have a price"""
+    conditions = [Gear.price.isnot(None)]
+    if brand:
+        conditions.append(Gear.brand == brand)
+    if category:
+        conditions.append(Gear.category == category)
+    return conditions
+
+def _summaries(conditions):
+    """Count, min, max, mean and nearest-rank percentiles per category, in one query"""
+    ranked = select(
+        Gear.category,
+        Gear.price,
+        func.cume_dist().over(partition_by=Gear.category, order_by=Gear.price).label('cume_dist')
+    ).where(*conditions).subquery()
+
+    # The p-th percentile is the smallest price whose cumulative share reaches p
+    percentile_columns = [
+        func.min(case((ranked.c.cume_dist >= p, ranked.c.price))).label(f'p{round(p * 100)}')
+        for p in PERCENTILES
+    ]
+    query = select(
+        ranked.c.category,
+        func.count(),
+        func.min(ranked.c.price),
+        func.max(ranked.c.price),
+        func.avg(ranked.c.price),
+        *percentile_columns
+    ).group_by(ranked.c.category).order_by(ranked.c.category)
+
+    return db.session.execute(query).all()
+
+def _bucket_counts(conditions, bins):
+    """Equal-width histogram bucket counts per category, in one query"""
+    bounds = select(
+        Gear.category,
+        func.min(Gear.price).label('low'),
+        func.max(Gear.price).label('high')
+    ).where(*conditions).group_by(Gear.category).subquery()
+
+    # Prices equal to the maximum fall into the last bucket
+    bucket = case(
+        (bounds.c.high == bounds.c.low, 0),
+        else_=func.min(
+            func.cast((Gear.price - bounds.c.low) * bins / (bounds.c.high - bounds.c.low), db.Integer),
+            bins - 1
+        )
+    ).label('bucket')
+
+    query = select(Gear.category, bucket, func.count()).join(
+        bounds, Gear.category == bounds.c.category
+    ).where(*conditions).group_by(Gear.category, bucket)
+
+    counts = {}
+    for category, index, count in db.session.execute(query):
+        counts.setdefault(category, {})[index] = count
+    return counts
+
+def price_stats(brand=None, category=None, bins=10):
+    """Price distribution per category: summary, percentiles and histogram"""
+    conditions = _priced_gear(brand, category)
+    counts = _bucket_counts(conditions, bins)
+
+    stats = {}
+    for row in _summaries(conditions):
+        name, count, low, high, mean = row[:5]
+        width = (high - low) / bins
+        stats[name] = {
+            'count': count,
+            'min': low,
+            'max': high,
+            'avg': round(mean, 2),
+            'percentiles': {
+                f'p{round(p * 100)}': value for p, value in zip(PERCENTILES, row[5:])
+            },
+            'histogram': [{
+                'min': round(low + index * width, 2),
+                'max': round(low + (index + 1) * width, 2),
+                'count': counts.get(name, {}).get(index, 0)
+            } for index in range(bins)]
+        }
+    return stats
@@ -1,9 +1,10 @@
-import requests
 from bs4 import BeautifulSoup
 from app.models.gear import Gear
+from app.services.fetcher import (
+    DEFAULT_JITTER, DEFAULT_MIN_INTERVAL, DEFAULT_PER_HOST_CONCURRENCY, PoliteFetcher
+)
+from app.services.recommendation_cache import recommendation_cache
 from app import db
-import time
-import random
 import re
 from urllib.parse import urljoin, urlparse
 import logging
@@ -13,16 +14,28 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RealHookahScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, per_host_concurrency=DEFAULT_PER_HOST_CONCURRENCY,
+                 min_interval=DEFAULT_MIN_INTERVAL, jitter=DEFAULT_JITTER, progress=None):
+        # Optional progress sink, such as a background ScrapeJob: told the
+        # number of pages, each page's outcome, and asked whether to stop
+        self.progress = progress
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
-        })
+        }
+        # Different websites are crawled in parallel; each one is sent at
+        # most per_host_concurrency requests at a time, min_interval to
+        # min_interval + jitter seconds apart
+        self.fetcher = PoliteFetcher(
+            self.headers,
+            per_host_concurrency=per_host_concurrency,
+            min_interval=min_interval,
+            jitter=jitter
+        )
         
         # Website configurations
         self.websites = {
@@ -85,52 +98,8 @@ class RealHookahScraper:
             logger.error(f"Unknown website: {website_name}")
             return []
         
-        config = self.websites[website_name]
-        products = []
-        
-        # Set current scraping category for context
-        self._current_scraping_category = category
-        
         try:
-            # Determine the URL to scrape
-            if category:
-                category_url = self._get_category_url(website_name, category)
-                if category_url:
-                    urls_to_scrape = [category_url]
-                    logger.info(f"Using category URL for {website_name}: {category_url}")
-                else:
-                    urls_to_scrape = [config['search_url']]
-                    logger.info(f"No category URL found, using default: {config['search_url']}")
-            else:
-                urls_to_scrape = [config['search_url']]
-                logger.info(f"Using default search URL for {website_name}: {config['search_url']}")
-            
-            # Scrape multiple pages
-            for page in range(1, max_pages + 1):
-                for base_url in urls_to_scrape:
-                    page_url = f"{base_url}?page={page}" if page > 1 else base_url
-                    logger.info(f"Scraping {website_name} - Page {page}: {page_url}")
-                    
-                    # Validate URL before making request
-                    try:
-                        from urllib.parse import urlparse
-                        parsed_url = urlparse(page_url)
-                        logger.info(f"URL validation - Scheme: {parsed_url.scheme}, Netloc: {parsed_url.netloc}, Path: {parsed_url.path}")
-                        
-                        if not parsed_url.scheme or not parsed_url.netloc:
-                            logger.error(f"Invalid URL structure: {page_url}")
-                            continue
-                            
-                    except Exception as e:
-                        logger.error(f"URL parsing error for {page_url}: {e}")
-                        continue
-                    
-                    page_products = self._scrape_page(website_name, page_url, config)
-                    products.extend(page_products)
-                    
-                    # Be respectful with delays
-                    time.sleep(random.uniform(2, 4))
-            
+            products = self._scrape_pages(self._page_targets(website_name, category, max_pages))
             logger.info(f"Scraped {len(products)} products from {website_name}")
             return products
             
@@ -138,12 +107,75 @@ class RealHookahScraper:
             logger.error(f"Error scraping {website_name}: {e}")
             return []
 
-    def _scrape_page(self, website_name, url, config):
-        """Scrape a single page"""
+    def _page_targets(self, website_name, category, max_pages):
+        """List the (website, category, page URL) triples to scrape for one website"""
+        config = self.websites[website_name]
+        
+        # Determine the URL to scrape
+        if category:
+            category_url = self._get_category_url(website_name, category)
+            if category_url:
+                urls_to_scrape = [category_url]
+                logger.info(f"Using category URL for {website_name}: {category_url}")
+            else:
+                urls_to_scrape = [config['search_url']]
+                logger.info(f"No category URL found, using default: {config['search_url']}")
+        else:
+            urls_to_scrape = [config['search_url']]
+            logger.info(f"Using default search URL for {website_name}: {config['search_url']}")
+        
+        targets = []
+        for page in range(1, max_pages + 1):
+            for base_url in urls_to_scrape:
+                page_url = f"{base_url}?page={page}" if page > 1 else base_url
+                
+                # Validate URL before queueing the request
+                parsed_url = urlparse(page_url)
+                if not parsed_url.scheme or not parsed_url.netloc:
+                    logger.error(f"Invalid URL structure: {page_url}")
+                    continue
+                
+                targets.append((website_name, category, page_url))
+        return targets
+
+    def _scrape_pages(self, targets):
+        """Fetch and parse (website, category, page URL) targets, keeping their order.
+
+        Pages from different websites are fetched in parallel and parsed on
+        the fetching thread.
+        """
+        progress = self.progress
+
+        def handler(website_name, category):
+            config = self.websites[website_name]
+
+            def handle(url, response):
+                page_products = self._parse_page(website_name, url, response, config, category)
+                if progress:
+                    if response.status_code == 200:
+                        progress.page_done(url, len(page_products))
+                    else:
+                        progress.page_failed(url, f"HTTP {response.status_code}")
+                return page_products
+            return handle
+
+        pages = [(page_url, handler(website_name, category)) for website_name, category, page_url in targets]
+        if progress:
+            progress.pages_planned(len(pages))
+        
+        products = []
+        for page_products in self.fetcher.fetch_all(
+            pages,
+            should_stop=(lambda: progress.cancelled) if progress else None,
+            on_error=(lambda url, e: progress.page_failed(url, str(e))) if progress else None
+        ):
+            products.extend(page_products or [])
+        return products
+
+    def _parse_page(self, website_name, url, response, config, category=None):
+        """Parse the products on a single fetched page"""
         try:
-            logger.info(f"Making request to: {url}")
-            response = self.session.get(url, timeout=10)
-            logger.info(f"Response status: {response.status_code}")
+            logger.info(f"Response status for {url}: {response.status_code}")
             
             if response.status_code != 200:
                 logger.error(f"HTTP {response.status_code} for URL: {url}")
@@ -159,7 +191,7 @@ class RealHookahScraper:
             
             for element in product_elements:
                 try:
-                    product = self._parse_product_element(element, website_name, config)
+                    product = self._parse_product_element(element, website_name, config, category)
                     if product:
                         products.append(product)
                 except Exception as e:
@@ -169,14 +201,11 @@ class RealHookahScraper:
             logger.info(f"Successfully parsed {len(products)} products from {website_name}")
             return products
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request error for {url}: {e}")
-            return []
         except Exception as e:
             logger.error(f"Error scraping page {url}: {e}")
             return []
 
-    def _parse_product_element(self, element, website_name, config):
+    def _parse_product_element(self, element, website_name, config, category=None):
         """Parse individual product element"""
         try:
             # Extract product name
@@ -217,9 +246,8 @@ class RealHookahScraper:
                 if rating_match:
                     rating = float(rating_match.group(1))
             
-            # Determine category based on URL context, product name, and current scraping category
-            current_category = getattr(self, '_current_scraping_category', None)
-            category = self._determine_category(name, product_url, config, current_category)
+            # Determine category based on URL context, product name, and the category being scraped
+            category = self._determine_category(name, product_url, config, category)
             
             # Extract brand from product name
             brand = self._extract_brand(name, website_name)
@@ -459,24 +487,14 @@ class RealHookahScraper:
         return category_urls.get(website_name, {}).get(category)
 
     def scrape_all_websites(self, categories=None, max_pages=2):
-        """Scrape all configured websites"""
-        all_products = []
-        
+        """Scrape all configured websites, in parallel across websites"""
+        targets = []
         for website_name in self.websites.keys():
             logger.info(f"Starting scrape of {website_name}")
-            
-            if categories:
-                for category in categories:
-                    products = self.scrape_website(website_name, category, max_pages)
-                    all_products.extend(products)
-            else:
-                products = self.scrape_website(website_name, max_pages=max_pages)
-                all_products.extend(products)
-            
-            # Be respectful with delays between websites
-            time.sleep(random.uniform(5, 10))
+            for category in categories or [None]:
+                targets.extend(self._page_targets(website_name, category, max_pages))
         
-        return all_products
+        return self._scrape_pages(targets)
 
     def save_products_to_db(self, products):
         """Save scraped products to database"""
@@ -511,6 +529,7 @@ class RealHookahScraper:
         
         try:
             db.session.commit()
+            recommendation_cache.clear()
             logger.info(f"Database updated: {added_count} new products, {updated_count} updated")
             return {'added': added_count, 'updated': updated_count}
         except Exception as e:
@@ -0,0 +1,96 @@
+"""
+Per-user cache of computed recommendations and collection summaries.
+
+Entries are keyed by user and request, and tagged with the user's
+collection version and the catalog version they were computed against,
+so a stale entry is never served even if an eviction is missed. The user
+routes and the scraper's save path evict entries explicitly to free them
+early.
+
+Concurrent misses for the same entry are single-flight: the first request
+computes while the others wait for its result.
+"""
+
+from collections import OrderedDict
+import threading
+from app.services.catalog import catalog_version, on_commit, on_reset
+
+class _Flight:
+    """One in-progress computation that other requests can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class RecommendationCache:
+    """LRU of recommendation results per (user, request key)"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()     # (user_id, key) -> (versions, value)
+        self._flights = {}                # ((user_id, key), versions) -> _Flight
+        self._collection_versions = {}    # user_id -> counter
+
+    def collection_version(self, user_id):
+        with self._lock:
+            return self._collection_versions.get(user_id, 0)
+
+    def collections_changed(self, changes):
+        """Bump the collection version of every user whose gear changed"""
+        users = {user_id for user_id, _ in changes.owned_added | changes.owned_removed}
+        with self._lock:
+            for user_id in users:
+                self._collection_versions[user_id] = self._collection_versions.get(user_id, 0) + 1
+
+    def get_or_compute(self, user_id, key, compute):
+        """Return the cached value for ``(user_id, key)``, computing it at most once"""
+        entry_key = (user_id, key)
+        with self._lock:
+            versions = (self._collection_versions.get(user_id, 0), catalog_version.value)
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(entry_key)
+                return entry[1]
+
+            flight = self._flights.get((entry_key, versions))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(entry_key, versions)] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop((entry_key, versions), None)
+                if flight.error is None:
+                    self._entries[entry_key] = (versions, flight.value)
+                    self._entries.move_to_end(entry_key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.value
+
+    def evict(self, user_id):
+        """Drop every entry for one user"""
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[entry_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+recommendation_cache = RecommendationCache()
+on_commit(recommendation_cache.collections_changed)
+on_reset(recommendation_cache.clear)
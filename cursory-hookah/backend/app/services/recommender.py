@@ -0,0 +1,243 @@
+"""
+Recommendation engine.
+
+A request is answered in stages: look up cached ids for the user and
+strategy; on a miss, build the user's profile from the in-memory tag
+index and use the batch job's precomputed rows if they were computed for
+the same collection, or else let the strategy rank gear ids in memory;
+then fetch the ranked rows with one primary-key query. With ``explain``
+each stage reports its time and candidate counts.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+import hashlib
+import time
+from sqlalchemy import func
+from app import db
+from app.models.gear import Gear, GearTag
+from app.models.recommendation import Recommendation
+from app.services.recommendation_cache import recommendation_cache
+from app.services.scoring import gear_scorer
+from app.services.serialization import gear_load_options
+from app.services.tag_index import tag_index
+
+# A user's collection as seen by the tag index: owned gear ids, sorted
+# and as a frozenset
+UserProfile = namedtuple('UserProfile', ['user_id', 'gear_ids', 'owned', 'tags', 'categories'])
+
+class Strategy:
+    """Ranks gear ids for a user profile"""
+
+    name = None
+    limit = 10
+
+    # Precomputed rows are stored under this scope
+    scope = ''
+
+    @property
+    def cache_key(self):
+        return self.name
+
+    def rank(self, profile, stats):
+        """Return up to ``limit`` gear ids, best first, recording counts in ``stats``"""
+        raise NotImplementedError
+
+class PopularStrategy(Strategy):
+    """Best rated and most reviewed gear, regardless of the collection"""
+
+    name = 'popular'
+    limit = 10
+
+    def rank(self, profile, stats):
+        return gear_scorer.recommend([], self.limit, stats=stats)
+
+class CompatibleStrategy(Strategy):
+    """The whole catalog scored against the user's gear"""
+
+    name = 'compatible'
+    limit = 15
+
+    def rank(self, profile, stats):
+        return gear_scorer.recommend(profile.gear_ids, self.limit, stats=stats)
+
+class CategoryStrategy(Strategy):
+    """Gear in one category sharing a compatibility tag with the user's gear"""
+
+    name = 'category'
+    limit = 10
+
+    def __init__(self, category):
+        self.category = category
+        self.scope = category
+
+    @property
+    def cache_key(self):
+        return (self.name, self.category)
+
+    def rank(self, profile, stats):
+        if profile.tags:
+            candidates = tag_index.compatible(profile.tags, category=self.category)
+        else:
+            candidates = tag_index.in_category(self.category)
+        stats['candidates'] = tag_index.count(candidates, exclude=profile.owned)
+        return tag_index.top_rated(candidates, self.limit, tags=profile.tags, exclude=profile.owned)
+
+class _Explain:
+    """Collects per-stage timings when enabled"""
+
+    def __init__(self, enabled):
+        self.stages = [] if enabled else None
+
+    @contextmanager
+    def stage(self, name):
+        stats = {}
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            if self.stages is not None:
+                elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+                self.stages.append({'stage': name, 'ms': elapsed_ms, **stats})
+
+def user_profile(user_id):
+    owned, tags, categories = tag_index.user_profile(user_id)
+    return UserProfile(user_id, sorted(owned), owned, tags, categories)
+
+def fetch_gear(gear_ids, fields=None):
+    """Load the given gear rows in one query, keeping the order of ``gear_ids``"""
+    if not gear_ids:
+        return []
+    gear_by_id = {
+        gear.id: gear
+        for gear in Gear.query.options(*gear_load_options(fields)).filter(Gear.id.in_(gear_ids))
+    }
+    return [gear_by_id[gear_id] for gear_id in gear_ids if gear_id in gear_by_id]
+
+def collection_fingerprint(gear_ids):
+    """Stable identifier of a collection, shared by every process"""
+    return hashlib.sha1(','.join(map(str, sorted(gear_ids))).encode()).hexdigest()
+
+def precomputed(user_id, scope, fingerprint):
+    """Precomputed (type, gear ids) for a collection, or None"""
+    rows = db.session.query(Recommendation.type, Recommendation.gear_id).filter(
+        Recommendation.user_id == user_id,
+        Recommendation.scope == scope,
+        Recommendation.fingerprint == fingerprint
+    ).order_by(Recommendation.position).all()
+    if not rows:
+        return None
+    return rows[0][0], [gear_id for _, gear_id in rows]
+
+def top_per_category(profile, limit, fields=None):
+    """Top ``limit`` gear per category for a profile, in one query.
+
+    Ranks like CategoryStrategy, every category at once: gear sharing a
+    tag with the profile, by shared tags then rating, numbered per
+    category with ROW_NUMBER(). Without tags, gear is ranked by rating.
+    Returns {category: [Gear]}.
+    """
+    if profile.tags:
+        shared = db.session.query(
+            GearTag.gear_id.label('gear_id'),
+            func.count().label('shared')
+        ).filter(GearTag.tag.in_(profile.tags)).group_by(GearTag.gear_id).subquery()
+        ranked = db.session.query(
+            Gear.id.label('gear_id'),
+            func.row_number().over(
+                partition_by=Gear.category,
+                order_by=(shared.c.shared.desc(), Gear.rating.desc(), Gear.id.desc())
+            ).label('position')
+        ).join(shared, shared.c.gear_id == Gear.id)
+    else:
+        ranked = db.session.query(
+            Gear.id.label('gear_id'),
+            func.row_number().over(
+                partition_by=Gear.category,
+                order_by=(Gear.rating.desc(), Gear.id.desc())
+            ).label('position')
+        )
+    if profile.gear_ids:
+        ranked = ranked.filter(Gear.id.notin_(profile.gear_ids))
+    ranked = ranked.subquery()
+
+    query = Gear.query.options(*gear_load_options(fields, Gear.category)).join(
+        ranked, ranked.c.gear_id == Gear.id
+    ).filter(ranked.c.position <= limit).order_by(Gear.category, ranked.c.position)
+
+    by_category = {}
+    for gear in query:
+        by_category.setdefault(gear.category, []).append(gear)
+    return by_category
+
+class Recommender:
+    """Runs a strategy for a user, through the per-user cache"""
+
+    def __init__(self, default=None, fallback=None):
+        self.default = default or CompatibleStrategy()
+        self.fallback = fallback or PopularStrategy()
+
+    def rank(self, profile, strategy=None, explain=None):
+        """Rank live for a profile; returns (strategy name, gear ids)"""
+        explain = explain or _Explain(False)
+        if strategy is None:
+            strategy = self.default if profile.gear_ids else self.fallback
+
+        with explain.stage('rank') as stats:
+            stats['strategy'] = strategy.name
+            gear_ids = strategy.rank(profile, stats)
+            stats['ranked'] = len(gear_ids)
+        return strategy.name, gear_ids
+
+    def _compute(self, user_id, strategy, explain):
+        with explain.stage('profile') as stats:
+            profile = user_profile(user_id)
+            stats['user_gear'] = len(profile.gear_ids)
+            stats['tags'] = len(profile.tags)
+
+        # Serve the batch job's rows unless the collection changed since
+        result = None
+        if profile.gear_ids:
+            with explain.stage('precomputed') as stats:
+                scope = strategy.scope if strategy else ''
+                result = precomputed(user_id, scope, collection_fingerprint(profile.gear_ids))
+                stats['hit'] = result is not None
+
+        if result is None:
+            result = self.rank(profile, strategy, explain)
+
+        return {'type': result[0], 'user_gear_count': len(profile.gear_ids), 'gear_ids': result[1]}
+
+    def recommend(self, user_id, strategy=None, fields=None, explain=False):
+        """Recommend gear for ``user_id``.
+
+        Without a ``strategy``, the default one is used, or the fallback if
+        the user has no gear. Returns a dict with ``type``,
+        ``user_gear_count``, the ``gear`` rows and, with ``explain``, the
+        ``explain`` stages.
+        """
+        explain = _Explain(explain)
+        cache_key = strategy.cache_key if strategy else 'default'
+
+        with explain.stage('cache') as stats:
+            computed = []
+
+            def compute():
+                computed.append(True)
+                return self._compute(user_id, strategy, explain)
+
+            result = recommendation_cache.get_or_compute(user_id, cache_key, compute)
+            stats['hit'] = not computed
+
+        with explain.stage('fetch') as stats:
+            gear = fetch_gear(result['gear_ids'], fields)
+            stats['rows'] = len(gear)
+
+        return {
+            'type': result['type'],
+            'user_gear_count': result['user_gear_count'],
+            'gear': gear,
+            'explain': explain.stages
+        }
+
+recommender = Recommender()
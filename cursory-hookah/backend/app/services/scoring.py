@@ -0,0 +1,359 @@
+"""
+Vectorized recommendation scoring.
+
+The catalog is held as a sparse gear-by-tag matrix (one row per gear, one
+column per compatibility tag) next to rating, review count and category
+arrays. A user's collection becomes a tag weight vector, and every gear
+is scored at once with one sparse matrix-vector product and a few array
+operations. Only the best few hundred scores are ever sorted.
+
+The matrix is built on first use. Rows written afterwards are kept in a
+small pending set and merged into the matrix once it grows large. The
+catalog statistics scores depend on (tag frequencies, the review count
+scale) are kept up to date over the live rows, and ties are broken by gear
+id, so results never depend on the order rows were written in: an
+incrementally updated scorer ranks exactly like a fresh build.
+"""
+
+import math
+import threading
+import numpy as np
+from scipy import sparse
+from app import db
+from app.models.gear import Gear
+from app.services.catalog import on_commit, on_reset
+
+# Score = TAG_WEIGHT * tag overlap + RATING_WEIGHT * rating
+#       + REVIEW_WEIGHT * review count - category penalties, each term in [0, 1]
+TAG_WEIGHT = 1.0
+RATING_WEIGHT = 0.35
+REVIEW_WEIGHT = 0.15
+
+# Scaled by the share of the user's collection already in the gear's category
+OWNED_CATEGORY_PENALTY = 0.2
+
+# Subtracted for each better-ranked result in the same category
+REPEAT_CATEGORY_PENALTY = 0.1
+
+# Candidates per requested result that are considered for diversity re-ranking
+CANDIDATE_POOL_FACTOR = 4
+
+# Rows written since the matrix was built before it is rebuilt
+MAX_PENDING_ROWS = 4096
+
+class _Matrix:
+    """Immutable snapshot of the scoring arrays, one row per gear"""
+
+    def __init__(self, gear_ids, tags, categories, ratings, reviews):
+        order = np.argsort(gear_ids, kind='stable')
+        self.gear_ids = gear_ids[order]          # ascending, for searchsorted lookups
+        self.tags = tags[order].tocsr()          # gear x tag, 1.0 where tagged
+        self.postings = self.tags.tocsc()        # tag x gear, to touch only the user's tags
+        self.categories = categories[order]      # category codes
+        self.category_rows = {int(code): np.flatnonzero(self.categories == code) for code in np.unique(self.categories)}
+        self.ratings = ratings[order]
+        self.reviews = reviews[order]
+        self.valid = np.ones(len(self.gear_ids), dtype=bool)
+
+        # How many valid rows carry each tag
+        self.tag_counts = np.bincount(self.tags.indices, minlength=self.tags.shape[1])
+
+        # The user-independent part of every score; -inf for masked rows
+        self.review_scale = _review_scale(self.reviews)
+        self.static_scores = _static_scores(self.ratings, self.reviews, self.review_scale)
+
+    def row(self, gear_id):
+        """Row index of a gear id, or None"""
+        row = int(np.searchsorted(self.gear_ids, gear_id))
+        if row < len(self.gear_ids) and self.gear_ids[row] == gear_id and self.valid[row]:
+            return row
+        return None
+
+    def invalidate(self, gear_ids):
+        """Copy of this matrix with the given gear rows masked out"""
+        rows = [row for row in map(self.row, gear_ids) if row is not None]
+        if not rows:
+            return self
+        matrix = object.__new__(_Matrix)
+        matrix.__dict__.update(self.__dict__)
+        matrix.valid = self.valid.copy()
+        matrix.valid[rows] = False
+        matrix.tag_counts = self.tag_counts.copy()
+        for row in rows:
+            matrix.tag_counts[self.tags.indices[self.tags.indptr[row]:self.tags.indptr[row + 1]]] -= 1
+        matrix.static_scores = self.static_scores.copy()
+        matrix.static_scores[rows] = -np.inf
+        return matrix
+
+    def rescale(self, review_scale):
+        """Copy of this matrix with static scores for another review scale"""
+        if review_scale == self.review_scale:
+            return self
+        matrix = object.__new__(_Matrix)
+        matrix.__dict__.update(self.__dict__)
+        matrix.review_scale = review_scale
+        matrix.static_scores = _static_scores(self.ratings, self.reviews, review_scale)
+        matrix.static_scores[~self.valid] = -np.inf
+        return matrix
+
+def _review_scale(reviews):
+    """Log of the largest review count, at least log(2)"""
+    return math.log1p(max(float(reviews.max()) if len(reviews) else 0.0, 1.0))
+
+def _static_scores(ratings, reviews, review_scale):
+    """Rating and review count terms of the score.
+
+    Scores are float64 so that summing the same terms in another order
+    (tag columns are numbered in the order tags were first seen) cannot
+    reorder results.
+    """
+    ratings = ratings.astype(np.float64)
+    reviews = reviews.astype(np.float64)
+    return RATING_WEIGHT * ratings / 5.0 + REVIEW_WEIGHT * np.minimum(np.log1p(reviews) / review_scale, 1.0)
+
+def _top_rows(scores, pool):
+    """Rows of the ``pool`` best scores, ties going to the higher rows (gear ids)"""
+    if pool >= len(scores):
+        return np.arange(len(scores))
+    if pool <= 0:
+        return np.array([], dtype=np.int64)
+    threshold = scores[np.argpartition(scores, len(scores) - pool)[len(scores) - pool:]].min()
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)
+    return np.concatenate([above, tied[len(tied) - (pool - len(above)):]])
+
+def _tag_matrix(tag_columns, num_columns):
+    """CSR matrix from one list of column indexes per row"""
+    indptr = np.zeros(len(tag_columns) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(columns) for columns in tag_columns])
+    indices = np.fromiter((c for columns in tag_columns for c in columns), dtype=np.int32, count=int(indptr[-1]))
+    data = np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(tag_columns), num_columns))
+
+class GearScorer:
+    """Scores the whole catalog against a user's collection"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._matrix = None
+        self._pending = {}          # gear id -> (category, rating, reviews, tag columns)
+        self._tag_columns = {}      # tag -> column
+        self._category_codes = {}   # category -> code
+        self._tag_frequency = None  # fraction of live gear carrying each tag
+        self._live_rows = 0         # valid matrix rows plus pending rows
+
+    def _update_statistics(self):
+        """Recompute the catalog statistics over valid and pending rows"""
+        matrix, pending = self._matrix, self._pending
+        reviews = matrix.reviews[matrix.valid]
+        if pending:
+            reviews = np.concatenate([reviews, np.array([v[2] for v in pending.values()], dtype=np.float32)])
+        self._matrix = matrix = matrix.rescale(_review_scale(reviews))
+
+        tag_counts = np.zeros(len(self._tag_columns), dtype=np.int64)
+        tag_counts[:len(matrix.tag_counts)] = matrix.tag_counts
+        for _, _, _, columns in pending.values():
+            tag_counts[columns] += 1
+        self._live_rows = int(matrix.valid.sum()) + len(pending)
+        self._tag_frequency = tag_counts / max(self._live_rows, 1)
+
+    def _encode(self, category, rating, reviews, tags):
+        category = self._category_codes.setdefault(category, len(self._category_codes))
+        columns = sorted({self._tag_columns.setdefault(tag, len(self._tag_columns)) for tag in tags or []})
+        return category, float(rating or 0.0), float(reviews or 0), columns
+
+    def _build(self, rows):
+        """Build the matrix from (id, category, rating, reviews, tags) rows"""
+        gear_ids, categories, ratings, reviews, tag_columns = [], [], [], [], []
+        for gear_id, *values in rows:
+            category, rating, review_count, columns = self._encode(*values)
+            gear_ids.append(gear_id)
+            categories.append(category)
+            ratings.append(rating)
+            reviews.append(review_count)
+            tag_columns.append(columns)
+
+        return _Matrix(
+            np.array(gear_ids, dtype=np.int64),
+            _tag_matrix(tag_columns, len(self._tag_columns)),
+            np.array(categories, dtype=np.int32),
+            np.array(ratings, dtype=np.float32),
+            np.array(reviews, dtype=np.float32)
+        )
+
+    def _state(self):
+        """The current matrix and a copy of the pending rows, loading on first use"""
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = self._build(db.session.query(
+                    Gear.id, Gear.category, Gear.rating, Gear.review_count, Gear.compatibility_tags
+                ))
+                self._update_statistics()
+            return (
+                self._matrix, dict(self._pending), self._tag_frequency, self._live_rows,
+                len(self._category_codes)
+            )
+
+    def _compact(self):
+        """Merge the pending rows into a new matrix"""
+        matrix, pending = self._matrix, self._pending
+        keep = matrix.valid
+        ids = list(pending)
+        values = [pending[gear_id] for gear_id in ids]
+        num_columns = len(self._tag_columns)
+
+        base = matrix.tags[keep]
+        base = sparse.csr_matrix((base.data, base.indices, base.indptr), shape=(base.shape[0], num_columns))
+        self._matrix = _Matrix(
+            np.concatenate([matrix.gear_ids[keep], np.array(ids, dtype=np.int64)]),
+            sparse.vstack([base, _tag_matrix([v[3] for v in values], num_columns)], format='csr'),
+            np.concatenate([matrix.categories[keep], np.array([v[0] for v in values], dtype=np.int32)]),
+            np.concatenate([matrix.ratings[keep], np.array([v[1] for v in values], dtype=np.float32)]),
+            np.concatenate([matrix.reviews[keep], np.array([v[2] for v in values], dtype=np.float32)])
+        )
+        self._pending = {}
+        self._update_statistics()
+
+    def snapshot(self):
+        """A picklable copy of the scorer, for ``load_snapshot`` in another process"""
+        self._state()
+        with self._lock:
+            return {
+                'matrix': self._matrix,
+                'pending': dict(self._pending),
+                'tag_columns': dict(self._tag_columns),
+                'category_codes': dict(self._category_codes),
+                'tag_frequency': self._tag_frequency,
+                'live_rows': self._live_rows
+            }
+
+    def load_snapshot(self, snapshot):
+        """Replace the scorer with a ``snapshot()``, without touching the database"""
+        with self._lock:
+            self._matrix = snapshot['matrix']
+            self._pending = dict(snapshot['pending'])
+            self._tag_columns = dict(snapshot['tag_columns'])
+            self._category_codes = dict(snapshot['category_codes'])
+            self._tag_frequency = snapshot['tag_frequency']
+            self._live_rows = snapshot['live_rows']
+
+    def invalidate(self):
+        """Drop the matrix; it is rebuilt on next use"""
+        with self._lock:
+            self._reset()
+
+    def apply(self, changes):
+        """Move changed gear rows out of the matrix and into the pending set"""
+        if not changes.catalog_changed:
+            return
+        with self._lock:
+            if self._matrix is None:
+                return
+
+            changed = changes.deleted_gear | set(changes.gear)
+            self._matrix = self._matrix.invalidate(changed)
+            for gear_id in changes.deleted_gear:
+                self._pending.pop(gear_id, None)
+            for gear_id, snapshot in changes.gear.items():
+                self._pending[gear_id] = self._encode(
+                    snapshot['category'], snapshot['rating'], snapshot['review_count'], snapshot['compatibility_tags']
+                )
+
+            if len(self._pending) > MAX_PENDING_ROWS:
+                self._compact()
+            else:
+                self._update_statistics()
+
+    def recommend(self, owned_ids, k, stats=None):
+        """The ``k`` best gear ids for a collection of ``owned_ids``, best first.
+
+        If ``stats`` is a dict, the number of rows scored and the size of
+        the re-ranked candidate pool are recorded in it.
+        """
+        matrix, pending, tag_frequency, live_rows, num_categories = self._state()
+        num_tags = len(tag_frequency)
+        owned_ids = set(owned_ids)
+
+        # Collection profile: how many owned items carry each tag and category
+        tag_counts = np.zeros(num_tags, dtype=np.float64)
+        category_counts = np.zeros(num_categories, dtype=np.float64)
+        owned_rows = []
+        for gear_id in owned_ids:
+            if gear_id in pending:
+                category, _, _, columns = pending[gear_id]
+            else:
+                row = matrix.row(gear_id)
+                if row is None:
+                    continue
+                owned_rows.append(row)
+                category = matrix.categories[row]
+                columns = matrix.tags.indices[matrix.tags.indptr[row]:matrix.tags.indptr[row + 1]]
+            tag_counts[columns] += 1
+            category_counts[category] += 1
+
+        # Rare tags say more about compatibility than ones most gear carries
+        tag_weights = tag_counts * (1.0 - np.log(np.maximum(tag_frequency, 1.0 / max(live_rows, 1))))
+        if tag_weights.sum() > 0:
+            tag_weights /= tag_weights.sum()
+        tag_weights = TAG_WEIGHT * tag_weights
+        category_penalty = OWNED_CATEGORY_PENALTY * category_counts / max(len(owned_ids), 1)
+
+        # Only the rows of the user's tags and categories are visited
+        scores = matrix.static_scores.copy()
+        for code in np.flatnonzero(category_penalty):
+            if code in matrix.category_rows:
+                scores[matrix.category_rows[code]] -= category_penalty[code]
+        postings = matrix.postings
+        for column in np.flatnonzero(tag_weights[:postings.shape[1]]):
+            scores[postings.indices[postings.indptr[column]:postings.indptr[column + 1]]] += tag_weights[column]
+        scores[owned_rows] = -np.inf
+
+        # Partial sort: only the candidate pool is ever ordered
+        pool = k * CANDIDATE_POOL_FACTOR
+        top_rows = _top_rows(scores, pool)
+        top_rows = top_rows[np.isfinite(scores[top_rows])]
+        candidates = list(zip(scores[top_rows], matrix.gear_ids[top_rows], matrix.categories[top_rows]))
+
+        extra = [(gear_id, values) for gear_id, values in pending.items() if gear_id not in owned_ids]
+        if extra:
+            static = _static_scores(
+                np.array([v[1] for _, v in extra], dtype=np.float32),
+                np.array([v[2] for _, v in extra], dtype=np.float32),
+                matrix.review_scale
+            )
+            for (gear_id, (category, _, _, columns)), score in zip(extra, static):
+                # Same operations, in the same order, as on the matrix rows
+                score = score - category_penalty[category]
+                for column in columns:
+                    if tag_weights[column]:
+                        score += tag_weights[column]
+                candidates.append((score, gear_id, category))
+            # Keep the same pool as if the pending rows were in the matrix
+            candidates = sorted(candidates, key=lambda c: (-c[0], -c[1]))[:pool]
+
+        if stats is not None:
+            stats['scored'] = int(np.isfinite(scores).sum()) + len(extra)
+            stats['pool'] = len(candidates)
+        return _diversify(candidates, k)
+
+def _diversify(candidates, k):
+    """Greedy top-k of (score, gear id, category) candidates, penalising each
+    pick by how often its category was already picked"""
+    candidates = sorted(candidates, key=lambda c: (-c[0], -c[1]))
+    picked, picked_per_category = [], {}
+    while candidates and len(picked) < k:
+        best = max(
+            range(len(candidates)),
+            key=lambda i: candidates[i][0] - REPEAT_CATEGORY_PENALTY * picked_per_category.get(candidates[i][2], 0)
+        )
+        _, gear_id, category = candidates.pop(best)
+        picked.append(int(gear_id))
+        picked_per_category[category] = picked_per_category.get(category, 0) + 1
+    return picked
+
+gear_scorer = GearScorer()
+on_commit(gear_scorer.apply)
+on_reset(gear_scorer.invalidate)
@@ -0,0 +1,235 @@
+"""
+Background scrape jobs.
+
+``POST /api/scraper/trigger`` submits a job to a small in-process thread
+pool and returns at once; the job crawls, saves the products, then
+refreshes the precomputed recommendations and the compatibility graph,
+recording its progress as it goes. Clients poll the job by id and may
+cancel it: a cancelled crawl stops sending requests and saves nothing.
+Once saving has started a job runs to completion.
+
+Jobs live in this process only and are forgotten on restart.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import logging
+import threading
+import uuid
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Jobs running at once; further jobs wait in the queue
+MAX_RUNNING_JOBS = 2
+
+# Finished jobs kept for polling before the oldest are forgotten
+MAX_FINISHED_JOBS = 50
+
+# Error messages kept per job
+MAX_ERRORS = 20
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+class ScrapeJob:
+    """One scrape request and its progress"""
+
+    def __init__(self, website, category=None, max_pages=2):
+        self.id = uuid.uuid4().hex
+        self.website = website
+        self.category = category
+        self.max_pages = max_pages
+        self.status = 'queued'
+        self.stage = None
+        self.pages_total = 0
+        self.pages_fetched = 0
+        self.products_parsed = 0
+        self.saved = {'added': 0, 'updated': 0}
+        self.error_count = 0
+        self.errors = []
+        self.result = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    # Progress reported by RealHookahScraper from its fetch threads
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def pages_planned(self, count):
+        with self._lock:
+            self.pages_total += count
+
+    def page_done(self, url, products):
+        with self._lock:
+            self.pages_fetched += 1
+            self.products_parsed += products
+
+    def page_failed(self, url, message):
+        with self._lock:
+            self.pages_fetched += 1
+            self._record_error(f"{url}: {message}")
+
+    def _record_error(self, message):
+        self.error_count += 1
+        self.errors = (self.errors + [message])[-MAX_ERRORS:]
+
+    # Lifecycle
+
+    def cancel(self):
+        """Ask the job to stop; returns False if it can no longer be cancelled"""
+        with self._lock:
+            if self.status in FINISHED_STATUSES or self.stage in ('saving', 'refreshing'):
+                return False
+            self._cancel.set()
+            if self.status == 'queued':
+                self._finish('cancelled')
+            return True
+
+    def _finish(self, status):
+        self.status = status
+        self.stage = None
+        self.finished_at = datetime.utcnow()
+
+    def set_stage(self, stage):
+        """Enter a stage; returns False if the job was cancelled before it"""
+        with self._lock:
+            if self._cancel.is_set() and stage in ('saving', 'refreshing'):
+                return False
+            if self.status == 'queued':
+                self.status = 'running'
+                self.started_at = datetime.utcnow()
+            self.stage = stage
+            return True
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'website': self.website,
+                'category': self.category,
+                'max_pages': self.max_pages,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': {
+                    'pages_total': self.pages_total,
+                    'pages_fetched': self.pages_fetched,
+                    'products_parsed': self.products_parsed,
+                    'saved': dict(self.saved),
+                    'errors': self.error_count
+                },
+                'errors': list(self.errors),
+                'result': self.result,
+                'created_at': self.created_at.isoformat(),
+                'started_at': self.started_at.isoformat() if self.started_at else None,
+                'finished_at': self.finished_at.isoformat() if self.finished_at else None
+            }
+
+def run_scrape(job, scraper=None):
+    """Crawl, save and refresh for one job, in an application context.
+
+    ``scraper`` replaces the RealHookahScraper used for real websites.
+    """
+    from app.services.batch_recommendations import precompute_recommendations
+    from app.services.compatibility_graph import compatibility_graph
+    from app.services.real_scrapers import RealHookahScraper
+    from app.services.scraper import HookahScraper
+
+    if not job.set_stage('fetching'):
+        return
+    if job.website == 'demo':
+        if not job.set_stage('saving'):
+            return
+        results = HookahScraper().scrape_demo()
+        products_found = len(results.get('products', []))
+        with job._lock:
+            job.pages_total = job.pages_fetched = 1
+            job.products_parsed = products_found
+            job.saved['added'] = results.get('added_to_db', 0)
+    else:
+        real_scraper = scraper or RealHookahScraper(progress=job)
+        if job.website == 'all':
+            products = real_scraper.scrape_all_websites(
+                categories=[job.category] if job.category else None,
+                max_pages=job.max_pages
+            )
+        else:
+            products = real_scraper.scrape_website(job.website, category=job.category, max_pages=job.max_pages)
+
+        if not job.set_stage('saving'):
+            return
+        results = real_scraper.save_products_to_db(products)
+        products_found = results.get('added', 0) + results.get('updated', 0)
+        with job._lock:
+            job.saved = {'added': results.get('added', 0), 'updated': results.get('updated', 0)}
+
+    # Refresh precomputed recommendations and the compatibility graph
+    # against the new catalog
+    job.set_stage('refreshing')
+    recommendations = precompute_recommendations()
+    compatibility_graph.rebuild()
+
+    job.result = {
+        'products_found': products_found,
+        'website': job.website,
+        'category': job.category,
+        'details': {key: value for key, value in results.items() if key != 'products'},
+        'recommendations': recommendations
+    }
+
+class ScrapeJobManager:
+    """Runs scrape jobs on a thread pool and keeps them for polling"""
+
+    def __init__(self, max_running=MAX_RUNNING_JOBS, scraper_factory=None):
+        # scraper_factory(job) builds the scraper for real websites
+        self._scraper_factory = scraper_factory
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()     # job id -> ScrapeJob, oldest first
+        self._pool = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix='scrape-job')
+
+    def submit(self, app, website, category=None, max_pages=2):
+        """Queue a scrape in ``app``'s context and return its job"""
+        job = ScrapeJob(website, category, max_pages)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._pool.submit(self._run, app, job)
+        return job
+
+    def _run(self, app, job):
+        with app.app_context():
+            try:
+                if not job.cancelled:
+                    run_scrape(job, self._scraper_factory(job) if self._scraper_factory else None)
+                with job._lock:
+                    if job.status not in FINISHED_STATUSES:
+                        job._finish('cancelled' if job.cancelled and job.result is None else 'completed')
+            except Exception as e:
+                logger.error(f"Scrape job {job.id} failed: {e}")
+                db.session.rollback()
+                with job._lock:
+                    job._record_error(str(e))
+                    job._finish('failed')
+            finally:
+                db.session.remove()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        """Known jobs, newest first"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+scrape_jobs = ScrapeJobManager()
@@ -1,6 +1,7 @@
 import requests
 from bs4 import BeautifulSoup
 from app.models.gear import Gear
+from app.services.recommendation_cache import recommendation_cache
 from app import db
 import time
 import random
@@ -71,6 +72,7 @@ class HookahScraper:
                 added_count += 1
         
         db.session.commit()
+        recommendation_cache.clear()
         
         return {
             'scraped_products': len(demo_products),
@@ -0,0 +1,42 @@
+import re
+from sqlalchemy import text
+from app import db
+
+def build_match_query(query_text):
+    """Turn free text into an FTS5 query that prefix-matches every term.
+
+    Terms are quoted so FTS5 operators and punctuation in user input are
+    treated as plain text. Returns None when the text has no terms.
+    """
+    terms = re.findall(r'\w+', query_text.lower())
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def search_gear_ids(query_text, category=None, brand=None, limit=20, offset=0):
+    """Return gear ids matching the text, best BM25 rank first.
+
+    ``rank`` is configured on the FTS table to weight name matches above
+    brand, model and description matches.
+    """
+    match = build_match_query(query_text)
+    if match is None:
+        return []
+
+    filters = ''
+    params = {'match': match, 'limit': limit, 'offset': offset}
+    if category:
+        filters += ' AND gear.category = :category'
+        params['category'] = category
+    if brand:
+        filters += ' AND gear.brand = :brand'
+        params['brand'] = brand
+
+    rows = db.session.execute(text(f"""
+        SELECT gear.id FROM gear_fts
+        JOIN gear ON gear.id = gear_fts.rowid
+        WHERE gear_fts MATCH :match{filters}
+        ORDER BY gear_fts.rank, gear.id
+        LIMIT :limit OFFSET :offset
+    """), params)
+    return [row[0] for row in rows]
@@ -0,0 +1,110 @@
+import json
+from sqlalchemy.orm import load_only
+from app.models.gear import Gear
+
+def parse_fields(value):
+    """Parse a comma-separated ``fields`` parameter into gear field names.
+
+    Returns None when no projection was requested. The id is always
+    included so clients can identify the rows they get back.
+    """
+    if not value:
+        return None
+
+    fields = ['id']
+    for field in value.split(','):
+        field = field.strip()
+        if not field or field in fields:
+            continue
+        if field not in Gear.SERIALIZED_FIELDS:
+            raise ValueError(f"Unknown field: {field}")
+        fields.append(field)
+
+    return fields
+
+def gear_load_options(fields, *extra_columns):
+    """Query options that load only the columns needed for ``fields``.
+
+    ``extra_columns`` are loaded as well, e.g. a sort column that is needed
+    to build a pagination cursor but was not requested by the client.
+    """
+    if fields is None:
+        return []
+    columns = [getattr(Gear, field) for field in fields]
+    columns.extend(column for column in extra_columns if column.key not in fields)
+    return [load_only(*columns)]
+
+RESPONSE_FORMATS = ('rows', 'columnar')
+
+# Low-cardinality columns sent as a dictionary plus integer codes
+DICTIONARY_ENCODED_FIELDS = ('category', 'brand', 'source_website')
+
+# Columns whose raw values need converting before they can be sent
+CONVERTED_FIELDS = ('specifications', 'compatibility_tags', 'created_at', 'updated_at')
+
+def parse_format(value):
+    """Validate the ``format`` parameter, defaulting to row objects"""
+    value = value or 'rows'
+    if value not in RESPONSE_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(RESPONSE_FORMATS)}")
+    return value
+
+def encode_columnar(fields, rows):
+    """Turn value tuples (in ``fields`` order) into one array per field.
+
+    Fields in DICTIONARY_ENCODED_FIELDS become ``{"dictionary": [...],
+    "codes": [...]}`` where each code indexes into the dictionary.
+    """
+    columns = {}
+    for index, field in enumerate(fields):
+        values = [row[index] for row in rows]
+        if field in CONVERTED_FIELDS:
+            values = [Gear.serialize_value(field, value) for value in values]
+        if field in DICTIONARY_ENCODED_FIELDS:
+            dictionary = {}
+            codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+            columns[field] = {'dictionary': list(dictionary), 'codes': codes}
+        else:
+            columns[field] = values
+
+    return {
+        'format': 'columnar',
+        'count': len(rows),
+        'columns': columns
+    }
+
+def encode_columnar_gear(fields, gear_list):
+    """Columnar encoding for already loaded Gear instances"""
+    fields = fields or Gear.SERIALIZED_FIELDS
+    return encode_columnar(fields, [tuple(getattr(gear, field) for field in fields) for gear in gear_list])
+
+def gear_list_payload(gear_list, fields=None, response_format='rows'):
+    """The ``data``/``count`` part of a response for loaded Gear instances"""
+    if response_format == 'columnar':
+        return encode_columnar_gear(fields, gear_list)
+    return {
+        'data': [gear.to_dict(fields) for gear in gear_list],
+        'count': len(gear_list)
+    }
+
+def gear_fragments(rows):
+    """Return the pre-encoded JSON for (id, json_cache) rows, in order.
+
+    Rows written without going through the ORM have no cached JSON (a
+    trigger clears it on such updates); those are encoded from a freshly
+    loaded Gear instead.
+    """
+    missing = [gear_id for gear_id, fragment in rows if fragment is None]
+    encoded = {}
+    if missing:
+        encoded = {gear.id: gear.to_json() for gear in Gear.query.filter(Gear.id.in_(missing))}
+    return [fragment if fragment is not None else encoded[gear_id] for gear_id, fragment in rows]
+
+def encode_gear_list(fragments, **extra):
+    """Assemble a listing response body by joining pre-encoded gear JSON.
+
+    ``extra`` holds additional top-level keys such as ``next_cursor``.
+    """
+    tail = json.dumps({'success': True, 'count': len(fragments), **extra},
+                      sort_keys=True, separators=(',', ':'))
+    return '{"data":[' + ','.join(fragments) + '],' + tail[1:]
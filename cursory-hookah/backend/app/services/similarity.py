@@ -0,0 +1,240 @@
+"""
+"More like this" lookups with MinHash and locality-sensitive hashing.
+
+Each product's name, brand, description and compatibility tags are turned
+into a set of word shingles, and the set into a MinHash signature whose
+positions agree between two products with probability equal to their
+Jaccard similarity. Signatures are cut into bands and every band is
+hashed into a bucket key, so a lookup only compares the products that
+share at least one bucket with the query instead of scanning the catalog.
+
+Bucket keys are kept as one sorted array per band and searched with
+binary search, which keeps the index at a few hundred bytes per product.
+The index is built on first use; rows written afterwards (e.g. by
+``save_products_to_db``) are indexed from the catalog change stream into a
+small pending set that is merged into the arrays once it grows large.
+"""
+
+import re
+import threading
+import zlib
+import numpy as np
+from app import db
+from app.models.gear import Gear
+from app.services.catalog import on_commit, on_reset
+
+# 20 bands of 3 rows: pairs above ~0.37 Jaccard similarity are likely to
+# share a bucket, pairs below ~0.1 almost never do
+BANDS = 20
+ROWS_PER_BAND = 3
+NUM_PERMUTATIONS = BANDS * ROWS_PER_BAND
+
+# Products hashed per vectorized batch when building the index
+BUILD_BATCH_SIZE = 2000
+
+# Most bytes of (permutation x shingle) hash values computed at once; a
+# batch's permutations are hashed in as many chunks as this needs
+MAX_HASH_BYTES = 16 * 1024 * 1024
+
+# Rows written since the index was built before the arrays are rebuilt
+MAX_PENDING_ROWS = 4096
+
+# Largest prime below 2**32; with a < 2**31 and crc32 values below 2**32
+# the hash a*x + b cannot overflow uint64
+_PRIME = np.uint64(4294967291)
+_random = np.random.default_rng(20240101)
+_A = _random.integers(1, 2 ** 31, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _random.integers(0, 2 ** 31, NUM_PERMUTATIONS, dtype=np.uint64)
+
+# Odd multipliers that mix the rows of a band into one bucket key
+_BAND_MIX = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64)
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+def shingles(name, brand, description, tags):
+    """Word unigrams and bigrams of the product text, plus its tags"""
+    words = _WORD.findall(' '.join(filter(None, (name, brand, description))).lower())
+    result = set(words)
+    result.update(f'{first} {second}' for first, second in zip(words, words[1:]))
+    result.update(f'tag:{tag}' for tag in tags or [])
+    return result
+
+def signatures(shingle_sets):
+    """MinHash signature matrix (one row per set) and a mask of non-empty sets"""
+    sizes = np.array([len(shingle_set) for shingle_set in shingle_sets], dtype=np.int64)
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode()) for shingle_set in shingle_sets for s in shingle_set),
+        dtype=np.uint64, count=int(sizes.sum())
+    )
+    non_empty = sizes > 0
+    sigs = np.zeros((len(shingle_sets), NUM_PERMUTATIONS), dtype=np.uint32)
+    if non_empty.any():
+        starts = (np.cumsum(sizes) - sizes)[non_empty]
+        chunk = max(1, MAX_HASH_BYTES // (hashes.itemsize * len(hashes)))
+        for first in range(0, NUM_PERMUTATIONS, chunk):
+            permutations = slice(first, first + chunk)
+            values = np.multiply.outer(_A[permutations], hashes)
+            values += _B[permutations, None]
+            values %= _PRIME
+            sigs[non_empty, permutations] = np.minimum.reduceat(values, starts, axis=1).T
+    return sigs, non_empty
+
+def band_keys(sigs):
+    """Bucket key per band for each row of a signature matrix.
+
+    A rare key collision only adds a candidate that then scores low.
+    """
+    bands = sigs.astype(np.uint64).reshape(len(sigs), BANDS, ROWS_PER_BAND)
+    mixed = np.bitwise_xor.reduce(bands * _BAND_MIX[:ROWS_PER_BAND], axis=2)
+    return (mixed >> np.uint64(32)).astype(np.uint32)
+
+class _Tables:
+    """Immutable signature matrix and per-band sorted bucket keys"""
+
+    def __init__(self, gear_ids, sigs):
+        order = np.argsort(gear_ids, kind='stable')
+        self.gear_ids = gear_ids[order]          # ascending, for searchsorted lookups
+        self.sigs = sigs[order]
+        self.valid = np.ones(len(self.gear_ids), dtype=bool)
+
+        keys = band_keys(self.sigs).T            # band x row
+        self.key_order = np.argsort(keys, axis=1, kind='stable').astype(np.int32)
+        self.keys = np.take_along_axis(keys, self.key_order, axis=1)
+
+    def row(self, gear_id):
+        row = int(np.searchsorted(self.gear_ids, gear_id))
+        if row < len(self.gear_ids) and self.gear_ids[row] == gear_id and self.valid[row]:
+            return row
+        return None
+
+    def invalidate(self, gear_ids):
+        """Copy of these tables with the given gear rows masked out"""
+        rows = [row for row in map(self.row, gear_ids) if row is not None]
+        if not rows:
+            return self
+        tables = object.__new__(_Tables)
+        tables.__dict__.update(self.__dict__)
+        tables.valid = self.valid.copy()
+        tables.valid[rows] = False
+        return tables
+
+    def candidates(self, keys):
+        """Valid rows sharing at least one bucket with ``keys``"""
+        rows = []
+        for band, key in enumerate(keys):
+            start = np.searchsorted(self.keys[band], key, side='left')
+            end = np.searchsorted(self.keys[band], key, side='right')
+            rows.append(self.key_order[band, start:end])
+        rows = np.unique(np.concatenate(rows))
+        return rows[self.valid[rows]]
+
+def _empty_tables():
+    return _Tables(np.zeros(0, dtype=np.int64), np.zeros((0, NUM_PERMUTATIONS), dtype=np.uint32))
+
+class SimilarityIndex:
+    """MinHash signatures and LSH buckets for the gear catalog"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._tables = None
+        self._pending = {}       # gear id -> (signature, band keys) written since the build
+
+    def _build(self, rows):
+        """Tables from (id, name, brand, description, tags) rows"""
+        gear_ids, sigs = [], []
+        for i in range(0, len(rows), BUILD_BATCH_SIZE):
+            batch = rows[i:i + BUILD_BATCH_SIZE]
+            batch_sigs, non_empty = signatures([shingles(*text) for _, *text in batch])
+            gear_ids.extend(gear_id for (gear_id, *_), keep in zip(batch, non_empty) if keep)
+            sigs.append(batch_sigs[non_empty])
+        if not gear_ids:
+            return _empty_tables()
+        return _Tables(np.array(gear_ids, dtype=np.int64), np.concatenate(sigs))
+
+    def _ensure_loaded(self):
+        if self._tables is not None:
+            return
+        with self._lock:
+            if self._tables is None:
+                self._tables = self._build(db.session.query(
+                    Gear.id, Gear.name, Gear.brand, Gear.description, Gear.compatibility_tags
+                ).all())
+
+    def _compact(self):
+        """Merge the pending rows into new tables"""
+        tables = self._tables
+        ids = list(self._pending)
+        pending_sigs = np.array([self._pending[gear_id][0] for gear_id in ids], dtype=np.uint32)
+        self._tables = _Tables(
+            np.concatenate([tables.gear_ids[tables.valid], np.array(ids, dtype=np.int64)]),
+            np.concatenate([tables.sigs[tables.valid], pending_sigs.reshape(-1, NUM_PERMUTATIONS)])
+        )
+        self._pending = {}
+
+    def invalidate(self):
+        """Drop the index; it is rebuilt on next use"""
+        with self._lock:
+            self._reset()
+
+    def apply(self, changes):
+        """Re-index the gear rows written by one commit"""
+        if not changes.catalog_changed:
+            return
+        with self._lock:
+            if self._tables is None:
+                return
+            changed = changes.deleted_gear | set(changes.gear)
+            self._tables = self._tables.invalidate(changed)
+            for gear_id in changed:
+                self._pending.pop(gear_id, None)
+
+            gear_ids = list(changes.gear)
+            sigs, non_empty = signatures([shingles(
+                changes.gear[gear_id]['name'], changes.gear[gear_id]['brand'],
+                changes.gear[gear_id]['description'], changes.gear[gear_id]['compatibility_tags']
+            ) for gear_id in gear_ids])
+            keys = band_keys(sigs)
+            for gear_id, sig, gear_keys, keep in zip(gear_ids, sigs, keys, non_empty):
+                if keep:
+                    self._pending[gear_id] = (sig, gear_keys)
+
+            if len(self._pending) > MAX_PENDING_ROWS:
+                self._compact()
+
+    def similar(self, gear_id, k):
+        """Up to ``k`` (gear id, estimated Jaccard similarity) pairs, most similar first"""
+        self._ensure_loaded()
+        with self._lock:
+            tables, pending = self._tables, dict(self._pending)
+
+        if gear_id in pending:
+            sig, keys = pending[gear_id]
+        else:
+            row = tables.row(gear_id)
+            if row is None:
+                return []
+            sig = tables.sigs[row]
+            keys = band_keys(sig[None])[0]
+
+        rows = tables.candidates(keys)
+        candidate_ids = tables.gear_ids[rows]
+        scores = (tables.sigs[rows] == sig).mean(axis=1)
+
+        # Pending rows are few; compare their bucket keys directly
+        extra = [
+            (other_id, (other_sig == sig).mean())
+            for other_id, (other_sig, other_keys) in pending.items()
+            if (other_keys == keys).any()
+        ]
+        results = [(int(other_id), float(score)) for other_id, score in zip(candidate_ids, scores)]
+        results.extend((other_id, float(score)) for other_id, score in extra)
+        results = [(other_id, score) for other_id, score in results if other_id != gear_id]
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results[:k]
+
+similarity_index = SimilarityIndex()
+on_commit(similarity_index.apply)
+on_reset(similarity_index.invalidate)
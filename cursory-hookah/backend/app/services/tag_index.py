@@ -0,0 +1,278 @@
+"""
+In-process inverted index for recommendation candidate generation.
+
+Each compatibility tag and category maps to a bitmap of gear ids, and each
+user to the set of gear ids they own. Bitmaps are Python ints with bit
+``gear_id`` set, so candidate sets are a few OR / AND operations on
+machine words instead of a database scan. Collections are small next to
+the catalog, so owned gear is kept as id sets and skipped while candidates
+are read out rather than masked off with catalog-sized bitmaps. The index
+is built on first use and then updated from the catalog change stream.
+"""
+
+import heapq
+import threading
+from app import db
+from app.models.gear import Gear
+from app.models.user import UserGear
+from app.services.catalog import on_commit, on_reset
+
+def bitmap_from_ids(ids):
+    """Build a bitmap with the bit for every id set"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for gear_id in ids:
+        buffer[gear_id >> 3] |= 1 << (gear_id & 7)
+    return int.from_bytes(buffer, 'little')
+
+def ids_from_bitmap(bitmap):
+    """Return the ids set in a bitmap, ascending"""
+    ids = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for byte_index, byte in enumerate(data):
+        while byte:
+            low_bit = byte & -byte
+            ids.append(byte_index * 8 + low_bit.bit_length() - 1)
+            byte ^= low_bit
+    return ids
+
+def _has_bit(bitmap_bytes, gear_id):
+    byte_index = gear_id >> 3
+    return byte_index < len(bitmap_bytes) and bitmap_bytes[byte_index] >> (gear_id & 7) & 1
+
+def _union(bitmaps):
+    result = 0
+    for bitmap in bitmaps:
+        result |= bitmap
+    return result
+
+class TagBitmapIndex:
+    """Tag, category and ownership bitmaps over the gear catalog"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.all_gear = 0
+        self.tags = {}        # tag -> bitmap
+        self.categories = {}  # category -> bitmap
+        self.owned = {}       # user id -> set of gear ids
+        self.gear = {}        # gear id -> (category, rating, tags)
+        self._by_rating = None  # gear ids, best rated first; rebuilt lazily
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._build()
+                self._loaded = True
+
+    def _build(self):
+        """Load the whole index with two queries"""
+        self._reset()
+        tag_ids, category_ids = {}, {}
+
+        rows = db.session.query(Gear.id, Gear.category, Gear.rating, Gear.compatibility_tags)
+        for gear_id, category, rating, tags in rows:
+            tags = tuple(dict.fromkeys(tags or []))
+            self.gear[gear_id] = (category, rating or 0.0, tags)
+            category_ids.setdefault(category, []).append(gear_id)
+            for tag in tags:
+                tag_ids.setdefault(tag, []).append(gear_id)
+
+        for user_id, gear_id in db.session.query(UserGear.user_id, UserGear.gear_id):
+            self.owned.setdefault(user_id, set()).add(gear_id)
+
+        self.all_gear = bitmap_from_ids(self.gear)
+        self.tags = {tag: bitmap_from_ids(ids) for tag, ids in tag_ids.items()}
+        self.categories = {category: bitmap_from_ids(ids) for category, ids in category_ids.items()}
+
+    def snapshot(self):
+        """A picklable copy of the index, for ``load_snapshot`` in another process"""
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                'all_gear': self.all_gear,
+                'tags': dict(self.tags),
+                'categories': dict(self.categories),
+                'owned': {user_id: frozenset(owned) for user_id, owned in self.owned.items()},
+                'gear': dict(self.gear)
+            }
+
+    def load_snapshot(self, snapshot):
+        """Replace the index with a ``snapshot()``, without touching the database"""
+        with self._lock:
+            self._reset()
+            self.all_gear = snapshot['all_gear']
+            self.tags = dict(snapshot['tags'])
+            self.categories = dict(snapshot['categories'])
+            self.owned = {user_id: set(owned) for user_id, owned in snapshot['owned'].items()}
+            self.gear = dict(snapshot['gear'])
+            self._loaded = True
+
+    def invalidate(self):
+        """Drop the index; it is rebuilt on next use"""
+        with self._lock:
+            self._loaded = False
+            self._reset()
+
+    def apply(self, changes):
+        """Apply one commit's CatalogChanges in a single pass per bitmap"""
+        with self._lock:
+            if not self._loaded:
+                # Nothing built yet; the first reader loads the current state
+                return
+
+            # Per bitmap key: ids whose bit is set, and ids whose bit is cleared
+            additions, removals = {}, {}
+
+            def move(group, old_key, new_key, gear_id):
+                if old_key == new_key:
+                    return
+                if old_key is not None:
+                    removals.setdefault((group, old_key), []).append(gear_id)
+                if new_key is not None:
+                    additions.setdefault((group, new_key), []).append(gear_id)
+
+            for gear_id in changes.deleted_gear | set(changes.gear):
+                old = self.gear.pop(gear_id, None)
+                new = changes.gear.get(gear_id)
+                if new is not None:
+                    new = (new['category'], new['rating'] or 0.0,
+                           tuple(dict.fromkeys(new['compatibility_tags'] or [])))
+                    self.gear[gear_id] = new
+
+                move('all', old and 'all', new and 'all', gear_id)
+                move('category', old and old[0], new and new[0], gear_id)
+                old_tags = set(old[2]) if old else set()
+                new_tags = set(new[2]) if new else set()
+                for tag in old_tags - new_tags:
+                    move('tag', tag, None, gear_id)
+                for tag in new_tags - old_tags:
+                    move('tag', None, tag, gear_id)
+
+            for user_id, gear_id in changes.owned_removed:
+                owned = self.owned.get(user_id)
+                if owned is not None:
+                    owned.discard(gear_id)
+                    if not owned:
+                        del self.owned[user_id]
+            for user_id, gear_id in changes.owned_added:
+                self.owned.setdefault(user_id, set()).add(gear_id)
+
+            if changes.catalog_changed:
+                self._by_rating = None
+
+            bitmaps = {'category': self.categories, 'tag': self.tags}
+            for key in set(additions) | set(removals):
+                group, name = key
+                current = self.all_gear if group == 'all' else bitmaps[group].get(name, 0)
+                current = (current | bitmap_from_ids(additions.get(key, ()))) & ~bitmap_from_ids(removals.get(key, ()))
+                if group == 'all':
+                    self.all_gear = current
+                elif current:
+                    bitmaps[group][name] = current
+                else:
+                    bitmaps[group].pop(name, None)
+
+    def user_ids(self):
+        """Ids of users with at least one owned gear"""
+        self._ensure_loaded()
+        with self._lock:
+            return list(self.owned)
+
+    def category_names(self):
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self.categories)
+
+    def owned_ids(self, user_id):
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self.owned.get(user_id, ()))
+
+    def user_profile(self, user_id):
+        """The user's owned gear ids (a frozenset), tags and categories"""
+        self._ensure_loaded()
+        with self._lock:
+            owned = frozenset(self.owned.get(user_id, ()))
+            tags, categories = set(), set()
+            for gear_id in owned:
+                if gear_id in self.gear:
+                    category, _, gear_tags = self.gear[gear_id]
+                    categories.add(category)
+                    tags.update(gear_tags)
+            return owned, tags, categories
+
+    def compatible(self, tags, category=None):
+        """Bitmap of gear sharing any of ``tags``"""
+        self._ensure_loaded()
+        with self._lock:
+            candidates = _union(self.tags.get(tag, 0) for tag in tags)
+            if category is not None:
+                candidates &= self.categories.get(category, 0)
+            return candidates
+
+    def outside_categories(self, categories):
+        """Bitmap of gear in none of ``categories``"""
+        self._ensure_loaded()
+        with self._lock:
+            return self.all_gear & ~_union(self.categories.get(c, 0) for c in categories)
+
+    def in_category(self, category):
+        self._ensure_loaded()
+        with self._lock:
+            return self.categories.get(category, 0)
+
+    def available(self):
+        """Bitmap of all gear"""
+        self._ensure_loaded()
+        with self._lock:
+            return self.all_gear
+
+    @staticmethod
+    def count(candidates, exclude=()):
+        """Number of ids in a bitmap, not counting those in ``exclude``"""
+        data = candidates.to_bytes((candidates.bit_length() + 7) // 8, 'little')
+        return candidates.bit_count() - sum(1 for gear_id in exclude if _has_bit(data, gear_id))
+
+    def top_rated(self, candidates, k, tags=None, exclude=()):
+        """The ``k`` best candidate ids not in ``exclude``, best first.
+
+        With ``tags``, more shared tags rank first and rating breaks ties.
+        Without, candidates are picked off a rating-ordered list, stopping
+        as soon as ``k`` are found.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if tags:
+                tags = set(tags)
+
+                def rank(gear_id):
+                    _, rating, gear_tags = self.gear[gear_id]
+                    return len(tags.intersection(gear_tags)), rating, gear_id
+
+                ids = [gear_id for gear_id in ids_from_bitmap(candidates)
+                       if gear_id in self.gear and gear_id not in exclude]
+                return heapq.nlargest(k, ids, key=rank)
+
+            if self._by_rating is None:
+                self._by_rating = sorted(self.gear, key=lambda gear_id: (self.gear[gear_id][1], gear_id), reverse=True)
+
+            data = candidates.to_bytes((candidates.bit_length() + 7) // 8, 'little')
+            top = []
+            for gear_id in self._by_rating:
+                if _has_bit(data, gear_id) and gear_id not in exclude:
+                    top.append(gear_id)
+                    if len(top) == k:
+                        break
+            return top
+
+tag_index = TagBitmapIndex()
+on_commit(tag_index.apply)
+on_reset(tag_index.invalidate)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Benchmark the recommendation endpoints on synthetic catalogs.
+
+Each catalog gets Zipf-distributed compatibility tags and item popularity,
+plus a population of users with collections of varying size. The demo
+user's collection is then resized between rounds, and the endpoints are
+driven through the Flask test client, cold (first request after the
+collection changed) and warm (served from the recommendation cache).
+Reports p50/p95/p99 latency, SQL queries per request and peak traced
+memory, and can save or compare against a baseline JSON file.
+
+Usage: python benchmark_recommendations.py [--sizes 10000 100000 1000000]
+           [--rounds 30] [--save baseline.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from sqlalchemy import event
+from app import create_app, db
+from app.models.gear import Gear, GearTag
+from app.models.user import UserGear
+
+CATEGORIES = ['hookah', 'bowl', 'hose', 'hmd', 'tobacco', 'coal', 'accessory']
+CATEGORY_WEIGHTS = [0.15, 0.2, 0.15, 0.1, 0.2, 0.1, 0.1]
+BRANDS = ['Khalil Mamoon', 'Shika', 'Kaloud', 'Provost', 'D-Hose', 'Starbuzz', 'Fumari', 'Aeon']
+NUM_TAGS = 500
+ZIPF_EXPONENT = 1.1
+NUM_USERS = 200
+COLLECTION_SIZES = [0, 1, 3, 10, 30]
+INSERT_BATCH = 10000
+WARM_REQUESTS = 5
+MEMORY_REQUESTS = 3
+DEMO_USER_ID = 1
+
+ENDPOINTS = {
+    'recommendations': '/api/recommendations/',
+    'category': '/api/recommendations/category/bowl',
+}
+
+def zipf_weights(count, exponent=ZIPF_EXPONENT):
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+def populate(size, rng):
+    """Insert ``size`` synthetic gear rows, their tags and user collections"""
+    tag_weights = zipf_weights(NUM_TAGS)
+    now = datetime.utcnow()
+    gear_rows, tag_rows = [], []
+
+    def flush():
+        if gear_rows:
+            db.session.execute(Gear.__table__.insert(), gear_rows)
+            db.session.execute(GearTag.__table__.insert(), tag_rows)
+            gear_rows.clear()
+            tag_rows.clear()
+
+    categories = rng.choice(CATEGORIES, size=size, p=CATEGORY_WEIGHTS)
+    tag_counts = rng.integers(2, 6, size=size)
+    for gear_id in range(1, size + 1):
+        category = str(categories[gear_id - 1])
+        brand = BRANDS[gear_id % len(BRANDS)]
+        tags = [f'tag_{t}' for t in rng.choice(NUM_TAGS, size=tag_counts[gear_id - 1], replace=False, p=tag_weights)]
+        gear_rows.append({
+            'id': gear_id,
+            'name': f'{brand} {category.title()} {gear_id}',
+            'category': category,
+            'brand': brand,
+            'description': f'Synthetic {category} from {brand}',
+            'price': round(float(rng.uniform(5, 300)), 2),
+            'compatibility_tags': tags,
+            'rating': round(float(rng.uniform(3, 5)), 1),
+            'review_count': int(min(rng.zipf(1.8), 5000)),
+            'source_website': 'benchmark',
+            'created_at': now,
+            'updated_at': now
+        })
+        tag_rows.extend({'gear_id': gear_id, 'tag': tag} for tag in tags)
+        if len(gear_rows) == INSERT_BATCH:
+            flush()
+    flush()
+
+    # Other users own popular items more often than obscure ones
+    popularity = zipf_weights(size)
+    user_rows = []
+    for user_id in range(DEMO_USER_ID + 1, DEMO_USER_ID + 1 + NUM_USERS):
+        count = int(rng.choice(COLLECTION_SIZES[1:]))
+        for gear_id in rng.choice(size, size=count, replace=False, p=popularity) + 1:
+            user_rows.append({'user_id': user_id, 'gear_id': int(gear_id), 'added_at': now})
+    db.session.execute(UserGear.__table__.insert(), user_rows)
+    db.session.commit()
+
+def set_collection(size, count, rng):
+    """Replace the demo user's collection through the ORM, so caches see it"""
+    for user_gear in UserGear.query.filter_by(user_id=DEMO_USER_ID):
+        db.session.delete(user_gear)
+    # The unit of work would run the inserts first, and a re-added item
+    # would hit the unique (user_id, gear_id) index
+    db.session.flush()
+    if count:
+        gear_ids = rng.choice(size, size=count, replace=False, p=zipf_weights(size)) + 1
+        db.session.add_all(UserGear(user_id=DEMO_USER_ID, gear_id=int(gear_id)) for gear_id in gear_ids)
+    db.session.commit()
+
+def timed_request(client, url, queries):
+    """Return (milliseconds, SQL statements) for one GET"""
+    before = len(queries)
+    started = time.perf_counter()
+    response = client.get(url)
+    elapsed = (time.perf_counter() - started) * 1000
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return elapsed, len(queries) - before
+
+def summarize(samples):
+    latencies = np.array([latency for latency, _ in samples])
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'queries': round(float(np.mean([count for _, count in samples])), 2),
+        'requests': len(samples)
+    }
+
+def benchmark_size(size, rounds, seed):
+    """Run every endpoint on a fresh catalog of ``size`` items"""
+    rng = np.random.default_rng(seed)
+    db_path = os.path.join(tempfile.mkdtemp(), 'recommendations.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+    client = app.test_client()
+    results = {}
+
+    with app.app_context():
+        db.session.query(UserGear).delete()
+        db.session.query(GearTag).delete()
+        db.session.query(Gear).delete()
+        db.session.commit()
+
+        started = time.perf_counter()
+        populate(size, rng)
+        results['populate_s'] = round(time.perf_counter() - started, 1)
+
+        queries = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+
+        # The first request builds the in-memory indexes
+        tracemalloc.start()
+        build_ms, _ = timed_request(client, ENDPOINTS['recommendations'], queries)
+        results['index_build'] = {'ms': round(build_ms, 1), 'peak_kb': tracemalloc.get_traced_memory()[1] // 1024}
+        tracemalloc.stop()
+
+        samples = {name: {'cold': [], 'warm': []} for name in ENDPOINTS}
+        for round_number in range(rounds):
+            set_collection(size, COLLECTION_SIZES[round_number % len(COLLECTION_SIZES)], rng)
+            for name, url in ENDPOINTS.items():
+                samples[name]['cold'].append(timed_request(client, url, queries))
+                for _ in range(WARM_REQUESTS):
+                    samples[name]['warm'].append(timed_request(client, url, queries))
+
+        for name, url in ENDPOINTS.items():
+            results[name] = {phase: summarize(phase_samples) for phase, phase_samples in samples[name].items()}
+
+            # Peak memory of a cold request, measured separately since
+            # tracing slows every allocation down
+            peaks = []
+            for _ in range(MEMORY_REQUESTS):
+                set_collection(size, COLLECTION_SIZES[-1], rng)
+                tracemalloc.start()
+                timed_request(client, url, queries)
+                peaks.append(tracemalloc.get_traced_memory()[1] // 1024)
+                tracemalloc.stop()
+            results[name]['cold']['peak_kb'] = max(peaks)
+
+    return results
+
+def print_results(size, results, baseline=None):
+    print(f"\n{size} items (populated in {results['populate_s']}s, "
+          f"index build {results['index_build']['ms']}ms / {results['index_build']['peak_kb']} KB)")
+    print(f"{'endpoint':<16} {'phase':<5} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'peak KB':>8}")
+    for name in ENDPOINTS:
+        for phase in ('cold', 'warm'):
+            stats = results[name][phase]
+            line = (f"{name:<16} {phase:<5} {stats['p50_ms']:>7.2f}ms {stats['p95_ms']:>7.2f}ms "
+                    f"{stats['p99_ms']:>7.2f}ms {stats['queries']:>8} {stats.get('peak_kb', ''):>8}")
+            previous = (baseline or {}).get(str(size), {}).get(name, {}).get(phase)
+            if previous:
+                change = stats['p95_ms'] / previous['p95_ms'] - 1 if previous['p95_ms'] else 0
+                line += f"   p95 {change:+.0%} vs baseline"
+                if change > 0.2:
+                    line += " ⚠️"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description='Recommendation endpoint benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--rounds', type=int, default=30, help='collection changes per catalog size')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help='write the results to this baseline JSON file')
+    parser.add_argument('--compare', help='compare p95 latency against this baseline JSON file')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+    print("Recommendation Endpoint Benchmark")
+    print("=" * 60)
+
+    all_results = {}
+    for size in sorted(args.sizes):
+        all_results[str(size)] = benchmark_size(size, args.rounds, args.seed)
+        print_results(size, all_results[str(size)], baseline)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'created_at': datetime.utcnow().isoformat(),
+                'rounds': args.rounds,
+                'seed': args.seed,
+                'results': all_results
+            }, f, indent=2)
+        print(f"\n✅ Baseline saved to {args.save}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the gear listing serialization paths: building to_dict() for every
+row and JSON-encoding the result, versus joining the pre-encoded json_cache
+fragments stored on each row
+
+Usage: python benchmark_serialization.py [ROWS ...]   (default: 1000 100000 1000000)
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import jsonify
+from app import create_app, db
+from app.models.gear import Gear
+from app.services.serialization import encode_gear_list, gear_fragments
+
+CATEGORIES = ['hookah', 'bowl', 'hose', 'hmd', 'tobacco', 'coal', 'accessory']
+BRANDS = ['Khalil Mamoon', 'Shika', 'Kaloud', 'Provost', 'D-Hose', 'Starbuzz', 'Fumari', 'Aeon']
+TAGS = ['standard_hose', 'egyptian_bowl', 'wide_base', 'modern_hose', 'phunnel_bowl',
+        'multi_port', 'ceramic', 'heat_management', 'clay', 'foil', 'silicone', 'washable']
+INSERT_BATCH = 10000
+
+def make_rows(count, start_id=1):
+    """Yield synthetic gear rows, including their pre-encoded JSON"""
+    now = datetime.utcnow()
+    for gear_id in range(start_id, start_id + count):
+        brand = random.choice(BRANDS)
+        category = random.choice(CATEGORIES)
+        gear = Gear(
+            id=gear_id,
+            name=f'{brand} {category.title()} {gear_id}',
+            category=category,
+            brand=brand,
+            model=f'M{gear_id % 97}',
+            description=f'Synthetic {category} from {brand} for benchmarking',
+            price=round(random.uniform(5, 300), 2),
+            image_url=f'https://example.com/images/{gear_id}.jpg',
+            product_url=f'https://example.com/products/{gear_id}',
+            specifications={'material': random.choice(['brass', 'stainless_steel', 'clay'])},
+            compatibility_tags=random.sample(TAGS, 3),
+            rating=round(random.uniform(3, 5), 1),
+            review_count=random.randint(0, 500),
+            source_website='benchmark',
+            created_at=now,
+            updated_at=now
+        )
+        row = {column.key: getattr(gear, column.key) for column in Gear.__table__.columns}
+        row['json_cache'] = gear.to_json()
+        yield row
+
+def populate(count):
+    """Bring the gear table up to ``count`` rows"""
+    existing = Gear.query.count()
+    batch = []
+    for row in make_rows(count - existing, start_id=existing + 1):
+        batch.append(row)
+        if len(batch) == INSERT_BATCH:
+            db.session.execute(Gear.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Gear.__table__.insert(), batch)
+    db.session.commit()
+
+def dict_path():
+    """Load every Gear, build its dict and let Flask encode the list"""
+    gear_list = Gear.query.all()
+    return jsonify({
+        'success': True,
+        'data': [gear.to_dict() for gear in gear_list],
+        'count': len(gear_list)
+    }).get_data()
+
+def fragment_path():
+    """Select only the pre-encoded JSON and join it into the body"""
+    rows = db.session.query(Gear.id, Gear.json_cache).all()
+    return encode_gear_list(gear_fragments(rows)).encode()
+
+def time_path(path, repeats):
+    """Return the best wall time over ``repeats`` runs and the body size"""
+    best = None
+    for _ in range(repeats):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        body = path()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(body)
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [1000, 100000, 1000000]
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+
+    print("Gear Listing Serialization Benchmark")
+    print("=" * 60)
+    print(f"{'rows':>10} {'to_dict + jsonify':>20} {'json_cache join':>17} {'speedup':>9}")
+
+    with app.test_request_context():
+        db.session.query(Gear).delete()
+        db.session.commit()
+
+        for size in sorted(sizes):
+            populate(size)
+            repeats = 5 if size <= 100000 else 2
+            dict_time, dict_bytes = time_path(dict_path, repeats)
+            fragment_time, fragment_bytes = time_path(fragment_path, repeats)
+            print(f"{size:>10} {dict_time * 1000:>18.1f}ms {fragment_time * 1000:>15.1f}ms "
+                  f"{dict_time / fragment_time:>8.1f}x")
+            print(f"{'':>10} {dict_bytes:>18} B {fragment_bytes:>15} B")
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app, db
 from app.models.gear import Gear
+from app.migrations import run_migrations
 
 def reset_database():
     """Reset the database and reload sample data"""
@@ -23,6 +24,7 @@ def reset_database():
         
         # Create all tables
         db.create_all()
+        run_migrations()
         print("✅ Created new database tables")
         
         # Import and run sample data initialization
@@ -14,6 +14,7 @@ sys.path.insert(0, str(backend_dir))
 from app import create_app, db
 from app.models.gear import Gear
 from app.models.user import User, UserGear
+from app.migrations import run_migrations
 from app.services.sample_data import initialize_sample_data
 
 def reset_database():
@@ -26,6 +27,7 @@ def reset_database():
         
         print("🏗️  Creating new tables...")
         db.create_all()
+        run_migrations()
         
         print("📝 Adding sample data...")
         initialize_sample_data()
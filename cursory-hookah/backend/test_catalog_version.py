@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Check that the catalog version follows every write to the database:
+writes from another connection, bulk statements, and separate apps,
+so cached responses and in-memory indexes never outlive the data
+"""
+
+import os
+import sqlite3
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import update
+from app import db
+from app.models.gear import Gear
+from test_query_plans import make_app
+
+def database_path(app):
+    with app.app_context():
+        return db.engine.url.database
+
+def get_facets(client, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    return client.get('/api/gear/facets', headers=headers)
+
+def category_count(response, category):
+    categories = response.get_json()['data']['categories']
+    return next((facet['count'] for facet in categories if facet['name'] == category), 0)
+
+def test_external_write_is_seen():
+    """A write from another connection changes the ETag, cached bodies and in-memory indexes"""
+    app = make_app()
+    client = app.test_client()
+
+    before = get_facets(client)
+    bowls = category_count(before, 'bowl')
+    assert client.get('/api/recommendations/').get_json()['type'] == 'popular'
+
+    with sqlite3.connect(database_path(app)) as connection:
+        gear_id = connection.execute("SELECT id FROM gear WHERE category != 'bowl' LIMIT 1").fetchone()[0]
+        connection.execute("UPDATE gear SET category = 'bowl' WHERE id = ?", (gear_id,))
+        connection.execute("INSERT INTO user_gear (user_id, gear_id, added_at) VALUES (1, ?, '2024-01-01')", (gear_id,))
+
+    after = get_facets(client, before.headers['ETag'])
+    assert after.status_code == 200, "stale ETag still matched"
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert category_count(after, 'bowl') == bowls + 1
+
+    recommendations = client.get('/api/recommendations/').get_json()
+    assert recommendations['type'] == 'compatible', "tag index missed the new collection entry"
+    assert recommendations['user_gear_count'] == 1
+
+def test_bulk_statement_moves_version():
+    """An ORM bulk UPDATE changes the ETag and cached bodies"""
+    app = make_app()
+    client = app.test_client()
+
+    before = get_facets(client)
+    with app.app_context():
+        db.session.execute(update(Gear).values(category='bowl'))
+        db.session.commit()
+        total = db.session.query(Gear).count()
+
+    after = get_facets(client, before.headers['ETag'])
+    assert after.status_code == 200, "stale ETag still matched"
+    assert category_count(after, 'bowl') == total
+
+def test_own_writes_keep_version_current():
+    """An ORM write from this process moves the version without a reset"""
+    app = make_app()
+    client = app.test_client()
+
+    before = get_facets(client)
+    with app.app_context():
+        gear = db.session.get(Gear, 1)
+        gear.category = 'hose' if gear.category != 'hose' else 'bowl'
+        db.session.commit()
+
+    after = get_facets(client, before.headers['ETag'])
+    assert after.status_code == 200
+    assert get_facets(client, after.headers['ETag']).status_code == 304
+
+def test_apps_do_not_share_versions():
+    """Apps on different databases never serve each other's bodies or ETags"""
+    first = make_app()
+    etag = get_facets(first.test_client()).headers['ETag']
+
+    second = make_app()
+    response = get_facets(second.test_client(), etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+if __name__ == "__main__":
+    print("Catalog Version Check")
+    print("=" * 50)
+
+    tests = (test_external_write_is_seen, test_bulk_statement_moves_version,
+             test_own_writes_keep_version_current, test_apps_do_not_share_versions)
+    for test in tests:
+        try:
+            test()
+            print(f"  ✅ {test.__doc__}")
+        except AssertionError as e:
+            print(f"  ❌ {test.__doc__}: {e}")
+            sys.exit(1)
+
+    print("\nThe catalog version follows every write!")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Check the "complete my setup" bundle search against brute force on small
+random catalogs, and that it gives up quickly when no setup can be built
+"""
+
+import itertools
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.compatibility_graph import CompatibilityGraph, SETUP_CATEGORIES
+
+def random_catalog(rng, per_category):
+    """(id, category, price, rating, tags) rows over a small tag vocabulary"""
+    tags = [f'tag_{i}' for i in range(rng.randint(3, 12))]
+    rows = []
+    for category in SETUP_CATEGORIES:
+        for _ in range(rng.randint(1, per_category)):
+            rows.append((
+                len(rows) + 1,
+                category,
+                round(rng.uniform(5, 120), 2),
+                rng.choice([3.0, 3.5, 4.0, 4.5, 5.0]),
+                rng.sample(tags, rng.randint(0, 2))
+            ))
+    return rows
+
+def graph_for(rows):
+    graph = CompatibilityGraph()
+    graph._load(rows)
+    return graph
+
+def shares_tag(graph, gear_id, others):
+    tags = set(graph.nodes[gear_id][3])
+    return any(tags & set(graph.nodes[other][3]) for other in others)
+
+def brute_force_score(graph, budget, owned):
+    """Best total rating over every compatible setup within the budget, or None"""
+    owned_categories = {graph.nodes[gear_id][0] for gear_id in owned}
+    order = [c for c in SETUP_CATEGORIES if c not in owned_categories]
+    candidates = [[i for i, node in graph.nodes.items() if node[0] == category] for category in order]
+    best = None
+    for bundle in itertools.product(*candidates):
+        if sum(graph.nodes[i][1] for i in bundle) > budget:
+            continue
+        if all(shares_tag(graph, gear_id, list(owned) + list(bundle[:depth]))
+               for depth, gear_id in enumerate(bundle) if depth or owned):
+            score = sum(graph.nodes[i][2] for i in bundle)
+            best = score if best is None else max(best, score)
+    return best
+
+def test_bundle_matches_brute_force():
+    """The pruned search finds a best-rated, compatible, affordable setup"""
+    for seed in range(200):
+        rng = random.Random(seed)
+        graph = graph_for(random_catalog(rng, per_category=5))
+        owned = rng.sample(sorted(graph.nodes), rng.randint(0, 2))
+        owned = [gear_id for gear_id in owned if graph.nodes[gear_id][0] not in
+                 {graph.nodes[other][0] for other in owned if other < gear_id}]
+        budget = rng.choice([20, 60, 120, 250, 500])
+
+        expected = brute_force_score(graph, budget, owned)
+        result = graph.best_bundle(budget, owned)
+        if expected is None:
+            assert result is None, f"seed {seed}: found {result}, expected none"
+            continue
+        assert result is not None, f"seed {seed}: found none, expected score {expected}"
+        ids, price, _ = result
+        assert abs(sum(graph.nodes[i][2] for i in ids) - expected) < 1e-9, f"seed {seed}: not the best rating"
+        assert price <= budget, f"seed {seed}: over budget"
+        assert all(shares_tag(graph, gear_id, owned + ids[:depth])
+                   for depth, gear_id in enumerate(ids) if depth or owned), f"seed {seed}: incompatible"
+
+def setup_catalog(rng, tags_for):
+    """100 items per category, tagged by ``tags_for(category, index)``"""
+    rows = []
+    for category in SETUP_CATEGORIES:
+        for index in range(100):
+            tags, price = tags_for(category, index)
+            rows.append((len(rows) + 1, category, price, round(rng.uniform(3, 5), 1), tags))
+    return rows
+
+def test_infeasible_bundle_is_fast():
+    """No compatible setup, with many candidates per category, is answered at once"""
+    rng = random.Random(0)
+
+    # No hose shares a tag with anything
+    def unmatched_hoses(category, index):
+        return ([f'hose_{index}'] if category == 'hose' else ['shared']), round(rng.uniform(10, 100), 2)
+
+    graph = graph_for(setup_catalog(rng, unmatched_hoses))
+    started = time.perf_counter()
+    assert graph.best_bundle(1000) is None
+    assert time.perf_counter() - started < 1.0
+
+    # Hoses only fit the HMDs that blow the budget
+    def expensive_hoses(category, index):
+        if category == 'hose':
+            return ['hose'], round(rng.uniform(10, 100), 2)
+        if category == 'hmd' and index < 5:
+            return ['shared', 'hose'], 500.0
+        return ['shared'], round(rng.uniform(10, 100), 2)
+
+    graph = graph_for(setup_catalog(rng, expensive_hoses))
+    started = time.perf_counter()
+    assert graph.best_bundle(400) is None
+    assert time.perf_counter() - started < 1.0
+    assert graph.best_bundle(1000) is not None
+
+if __name__ == "__main__":
+    print("Compatibility Bundle Check")
+    print("=" * 50)
+
+    for test in (test_bundle_matches_brute_force, test_infeasible_bundle_is_fast):
+        try:
+            test()
+            print(f"  ✅ {test.__doc__}")
+        except AssertionError as e:
+            print(f"  ❌ {test.__doc__}: {e}")
+            sys.exit(1)
+
+    print("\nBundle search matches brute force!")
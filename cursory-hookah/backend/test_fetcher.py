@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Check the polite page fetcher and the real-website scraper with a fake
+transport and a fake clock: per-host concurrency, request pacing,
+stopping, error reporting and scrape progress
+"""
+
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.fetcher import PoliteFetcher
+from app.services.real_scrapers import RealHookahScraper
+from app.services.scrape_jobs import ScrapeJob
+
+PRODUCT_PAGE = b'''
+<div class="product-item"><h3 class="product-name"><a href="/kaloud-lotus">Kaloud Lotus Bowl</a></h3><span class="price">$39.99</span></div>
+<div class="product-item"><h3 class="product-name"><a href="/shika-hose">Shika Silicone Hose</a></h3><span class="price">$24.50</span></div>
+'''
+
+class FakeClock:
+    """Virtual time, kept per thread so parallel sleeps do not mix"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(self):
+        return getattr(self._local, 'now', 0.0)
+
+    def sleep(self, seconds):
+        self._local.now = self() + seconds
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=b''):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {'Content-Type': 'text/html'}
+
+class FakeFetcher(PoliteFetcher):
+    """PoliteFetcher whose requests are answered by ``respond(url)``.
+
+    Records each request's (clock time, url) and the most requests in
+    flight at once, per host and overall.
+    """
+
+    def __init__(self, respond=None, latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.respond = respond or (lambda url: FakeResponse())
+        self.latency = latency
+        self.requests = []
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self.max_total_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        host = url.split('/')[2]
+        with self._lock:
+            self.requests.append((self.clock(), url))
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.max_in_flight[host] = max(self.max_in_flight.get(host, 0), self.in_flight[host])
+            self.max_total_in_flight = max(self.max_total_in_flight, sum(self.in_flight.values()))
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            response = self.respond(url)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        finally:
+            with self._lock:
+                self.in_flight[host] -= 1
+
+def pages_for(hosts, count):
+    return [(f'https://{host}/page/{page}', lambda url, response: url) for host in hosts for page in range(count)]
+
+def test_per_host_concurrency():
+    """No host gets more than per_host_concurrency requests at once, while hosts run in parallel"""
+    hosts = ['a.example', 'b.example', 'c.example']
+    fetcher = FakeFetcher(latency=0.02, per_host_concurrency=2, min_interval=0, jitter=0)
+    pages = pages_for(hosts, 6)
+
+    results = fetcher.fetch_all(pages)
+
+    assert results == [url for url, _ in pages], "results not in input order"
+    assert fetcher.max_in_flight == {host: 2 for host in hosts}, fetcher.max_in_flight
+    assert fetcher.max_total_in_flight > 2, "hosts were not fetched in parallel"
+
+def test_pacing():
+    """Each host's requests start min_interval to min_interval + jitter apart"""
+    clock = FakeClock()
+    fetcher = FakeFetcher(min_interval=2.0, jitter=1.0, clock=clock, sleep=clock.sleep)
+
+    fetcher.fetch_all(pages_for(['a.example', 'b.example'], 5))
+
+    for host in ('a.example', 'b.example'):
+        times = [at for at, url in fetcher.requests if host in url]
+        assert len(times) == 5
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        assert all(2.0 <= gap <= 3.0 for gap in gaps), f"{host} gaps {gaps}"
+
+def test_should_stop():
+    """Once should_stop() is true no further request is sent"""
+    fetcher = FakeFetcher(min_interval=0, jitter=0)
+    pages = pages_for(['a.example'], 5)
+
+    results = fetcher.fetch_all(pages, should_stop=lambda: len(fetcher.requests) >= 2)
+
+    assert len(fetcher.requests) == 2
+    assert results[:2] == [pages[0][0], pages[1][0]]
+    assert results[2:] == [None, None, None]
+
+def test_errors_reported():
+    """Failed requests and handlers yield None, are reported, and do not stop the crawl"""
+    def respond(url):
+        return ConnectionError('refused') if url.endswith('/1') else FakeResponse()
+
+    def handle(url, response):
+        if url.endswith('/2'):
+            raise ValueError('bad page')
+        return url
+
+    fetcher = FakeFetcher(respond, min_interval=0, jitter=0)
+    pages = [(f'https://a.example/page/{page}', handle) for page in range(4)]
+    errors = []
+
+    results = fetcher.fetch_all(pages, on_error=lambda url, e: errors.append((url, type(e))))
+
+    assert results == [pages[0][0], None, None, pages[3][0]]
+    assert sorted(errors) == [(pages[1][0], ConnectionError), (pages[2][0], ValueError)]
+
+def scraper_with(respond, job=None):
+    scraper = RealHookahScraper(progress=job)
+    scraper.fetcher = FakeFetcher(respond, headers=scraper.headers, min_interval=0, jitter=0)
+    return scraper
+
+def test_scraper_reports_progress():
+    """Every website is crawled once; parsed products, HTTP errors and failures reach the job"""
+    def respond(url):
+        if 'southsmoke' in url:
+            return FakeResponse(content=PRODUCT_PAGE)
+        if '5starhookah' in url:
+            return FakeResponse(status_code=503)
+        return ConnectionError('refused')
+
+    job = ScrapeJob('all')
+    scraper = scraper_with(respond, job)
+
+    products = scraper.scrape_all_websites(max_pages=1)
+
+    assert sorted(p['name'] for p in products) == ['Kaloud Lotus Bowl', 'Shika Silicone Hose']
+    assert {p['category'] for p in products} == {'bowl', 'hose'}
+    assert all(p['product_url'].startswith('https://www.southsmoke.com/') for p in products)
+    assert len(scraper.fetcher.requests) == len(scraper.websites)
+    assert scraper.fetcher.headers['User-Agent'] == scraper.headers['User-Agent']
+
+    progress = job.to_dict()['progress']
+    assert progress['pages_total'] == progress['pages_fetched'] == len(scraper.websites)
+    assert progress['products_parsed'] == 2
+    assert progress['errors'] == 2
+    assert any('HTTP 503' in error for error in job.errors)
+    assert any('refused' in error for error in job.errors)
+
+def test_scraper_stops_when_cancelled():
+    """A cancelled job's scraper sends no further requests"""
+    job = ScrapeJob('southsmoke')
+
+    def respond(url):
+        job.cancel()
+        return FakeResponse(content=PRODUCT_PAGE)
+
+    scraper = scraper_with(respond, job)
+    products = scraper.scrape_website('southsmoke', max_pages=4)
+
+    assert len(scraper.fetcher.requests) == 1
+    assert len(products) == 2
+    assert job.to_dict()['progress']['pages_total'] == 4
+
+if __name__ == "__main__":
+    print("Polite Fetcher Check")
+    print("=" * 50)
+
+    tests = (test_per_host_concurrency, test_pacing, test_should_stop, test_errors_reported,
+             test_scraper_reports_progress, test_scraper_stops_when_cancelled)
+    for test in tests:
+        try:
+            test()
+            print(f"  ✅ {test.__doc__}")
+        except AssertionError as e:
+            print(f"  ❌ {test.__doc__}: {e}")
+            sys.exit(1)
+
+    print("\nFetcher and scraper behave politely!")
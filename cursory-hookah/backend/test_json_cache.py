@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Check that the listing endpoints serving pre-encoded gear JSON show rows
+written by bulk statements and other connections, not the stale cache
+"""
+
+import json
+import os
+import sqlite3
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import update
+from app import db
+from app.models.gear import Gear
+from test_query_plans import make_app
+
+def listed_prices(client, gear_id):
+    """Price of ``gear_id`` as shown by each endpoint that serves json_cache"""
+    prices = {}
+
+    listing = client.get('/api/gear/').get_json()['data']
+    prices['listing'] = next(item['price'] for item in listing if item['id'] == gear_id)
+
+    streamed = json.loads(client.get('/api/gear/?stream=1').get_data(as_text=True))['data']
+    prices['stream'] = next(item['price'] for item in streamed if item['id'] == gear_id)
+
+    batch = client.get(f'/api/gear/batch?ids={gear_id}').get_json()['data']
+    prices['batch'] = batch[0]['price']
+
+    exported = [json.loads(line) for line in client.get('/api/user/gear/export').get_data(as_text=True).splitlines()]
+    prices['export'] = next(entry['gear']['price'] for entry in exported if entry['gear_id'] == gear_id)
+
+    prices['detail'] = client.get(f'/api/gear/{gear_id}').get_json()['data']['price']
+    return prices
+
+def test_bulk_update_shows_in_listings():
+    """An ORM bulk UPDATE shows up in the listing, stream, batch and export"""
+    app = make_app()
+    client = app.test_client()
+    client.post('/api/user/gear', json={'gear_id': 1})
+    listed_prices(client, 1)
+
+    with app.app_context():
+        db.session.execute(update(Gear).where(Gear.id == 1).values(price=1.0))
+        db.session.commit()
+
+    prices = listed_prices(client, 1)
+    assert set(prices.values()) == {1.0}, prices
+
+def test_external_update_shows_in_listings():
+    """An UPDATE from another connection shows up the same way"""
+    app = make_app()
+    client = app.test_client()
+    client.post('/api/user/gear', json={'gear_id': 2})
+    listed_prices(client, 2)
+
+    with app.app_context():
+        path = db.engine.url.database
+    with sqlite3.connect(path) as connection:
+        connection.execute('UPDATE gear SET price = 2.5 WHERE id = 2')
+
+    prices = listed_prices(client, 2)
+    assert set(prices.values()) == {2.5}, prices
+
+def test_orm_update_keeps_cache():
+    """Saving through the ORM stores fresh JSON instead of clearing it"""
+    app = make_app()
+
+    with app.app_context():
+        gear = db.session.get(Gear, 3)
+        gear.price = 3.25
+        db.session.commit()
+        json_cache = db.session.query(Gear.json_cache).filter(Gear.id == 3).scalar()
+
+    assert json_cache is not None, "json_cache was cleared"
+    assert json.loads(json_cache)['price'] == 3.25
+
+if __name__ == "__main__":
+    print("Gear JSON Cache Check")
+    print("=" * 50)
+
+    tests = (test_bulk_update_shows_in_listings, test_external_update_shows_in_listings, test_orm_update_keeps_cache)
+    for test in tests:
+        try:
+            test()
+            print(f"  ✅ {test.__doc__}")
+        except AssertionError as e:
+            print(f"  ❌ {test.__doc__}: {e}")
+            sys.exit(1)
+
+    print("\nListings never serve stale gear JSON!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Walk the gear listing page by page with every sort key and check that the
+keyset cursors visit each item exactly once, in listing order, even with
+NULL and duplicate sort values
+"""
+
+import os
+import random
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import update
+from app import db
+from app.models.gear import Gear
+from app.routes.gear import SORT_KEYS
+from test_query_plans import make_app
+
+# Few distinct values, so pages often end in the middle of a run of ties
+RATINGS = [None, 3.5, 4.0, 4.0, 4.5, 5.0]
+PRICES = [None, 19.99, 19.99, 35.0, 35.0, 120.0]
+
+PAGE_SIZES = [1, 3, 7, 50]
+
+def add_gear(app, count, seed=0):
+    """Add ``count`` items with NULL and duplicate ratings and prices"""
+    rng = random.Random(seed)
+    ratings = [rng.choice(RATINGS) for _ in range(count)]
+    with app.app_context():
+        gear = [Gear(
+            name=f'Paging Test Bowl {i}',
+            category=rng.choice(['bowl', 'hose']),
+            brand=rng.choice(['Kaloud', 'Shika']),
+            price=rng.choice(PRICES),
+            rating=rating,
+            compatibility_tags=[]
+        ) for i, rating in enumerate(ratings)]
+        db.session.add_all(gear)
+        db.session.flush()
+        # The model stores a missing rating as 0.0; older rows may hold NULL
+        unrated = [item.id for item, rating in zip(gear, ratings) if rating is None]
+        db.session.execute(update(Gear).where(Gear.id.in_(unrated)).values(rating=None))
+        db.session.commit()
+
+def expected_order(app, sort, category=None):
+    """Ids in listing order, ranked in Python: SQLite puts NULL below any value"""
+    column, descending = SORT_KEYS[sort]
+    with app.app_context():
+        query = db.session.query(Gear.id, column)
+        if category:
+            query = query.filter(Gear.category == category)
+        rows = query.all()
+
+    def key(row):
+        gear_id, value = row
+        return (value is not None, value if value is not None else 0, gear_id)
+
+    return [gear_id for gear_id, _ in sorted(rows, key=key, reverse=descending)]
+
+def walk(client, sort, limit, total, extra=''):
+    """Follow next_cursor from the first page to the last; returns the ids seen.
+
+    Gives up once more than ``total`` items came back, so a cursor that
+    does not advance fails instead of looping forever.
+    """
+    ids, cursor = [], None
+    while True:
+        url = f'/api/gear/?sort={sort}&limit={limit}{extra}'
+        if cursor:
+            url += f'&cursor={cursor}'
+        response = client.get(url)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        payload = response.get_json()
+        assert len(payload['data']) <= limit
+        ids.extend(item['id'] for item in payload['data'])
+        assert len(ids) <= total, f"{sort} limit {limit}: pages do not advance"
+        cursor = payload['next_cursor']
+        if not cursor:
+            return ids
+
+def test_keyset_pagination_visits_every_item_once():
+    """Every sort key and page size lists each item once, in order"""
+    app = make_app()
+    add_gear(app, 120)
+    client = app.test_client()
+
+    for sort in SORT_KEYS:
+        expected = expected_order(app, sort)
+        for limit in PAGE_SIZES:
+            ids = walk(client, sort, limit, len(expected))
+            assert len(ids) == len(set(ids)), f"{sort} limit {limit}: repeated items"
+            assert set(ids) == set(expected), f"{sort} limit {limit}: missing items"
+            assert ids == expected, f"{sort} limit {limit}: out of order"
+
+def test_keyset_pagination_with_filter():
+    """Cursors keep working on a filtered listing"""
+    app = make_app()
+    add_gear(app, 60, seed=1)
+    client = app.test_client()
+
+    for sort in SORT_KEYS:
+        expected = expected_order(app, sort, category='bowl')
+        ids = walk(client, sort, 4, len(expected), extra='&category=bowl')
+        assert ids == expected, f"{sort}: filtered walk"
+
+if __name__ == "__main__":
+    print("Keyset Pagination Check")
+    print("=" * 50)
+
+    for test in (test_keyset_pagination_visits_every_item_once, test_keyset_pagination_with_filter):
+        try:
+            test()
+            print(f"  ✅ {test.__doc__}")
+        except AssertionError as e:
+            print(f"  ❌ {test.__doc__}: {e}")
+            sys.exit(1)
+
+    print("\nEvery page walk visits each item exactly once!")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Check how many SQL statements the user collection endpoints execute, so
+per-row lazy loads and extra round trips do not creep back in
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from app import db
+from test_query_plans import make_app
+
+# Every request first reads the catalog_version row; a request that
+# writes also locks it before its first write and reads it again at commit
+VERSION_READ = 1
+VERSION_WRITE = 2
+
+def count_statements(app, action):
+    """Run ``action`` and return the SQL statements it executed"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(' '.join(statement.split()))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = action()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return result, statements
+
+def check_count(label, statements, expected):
+    """Print the result for one request and return True if it ran at most ``expected`` statements"""
+    if len(statements) <= expected:
+        print(f"  ✅ {label}: {len(statements)} statements")
+        return True
+    print(f"  ❌ {label}: {len(statements)} statements, expected at most {expected}")
+    for statement in statements:
+        print(f"     {statement}")
+    return False
+
+def test_collection_query_counts():
+    """Listing is one joined query; adding and removing are one write each"""
+    app = make_app()
+    client = app.test_client()
+    results = []
+
+    # Adding: the conditional insert, then the joined row for the response
+    for gear_id in (1, 2, 3):
+        response, statements = count_statements(app, lambda: client.post('/api/user/gear', json={'gear_id': gear_id}))
+        assert response.status_code == 201
+        results.append(check_count(f'POST /api/user/gear {gear_id}', statements, 2 + VERSION_READ + VERSION_WRITE))
+
+    # Listing costs the same however many items the collection holds
+    response, statements = count_statements(app, lambda: client.get('/api/user/gear'))
+    assert response.status_code == 200
+    assert [item['gear']['id'] for item in response.get_json()['data']] == [1, 2, 3]
+    results.append(check_count('GET /api/user/gear', statements, 1 + VERSION_READ))
+
+    response, statements = count_statements(app, lambda: client.post('/api/user/gear', json={'gear_id': 1}))
+    assert response.status_code == 400
+    results.append(check_count('POST /api/user/gear duplicate', statements, 2 + VERSION_READ + VERSION_WRITE))
+
+    response, _ = count_statements(app, lambda: client.post('/api/user/gear', json={'gear_id': 999999}))
+    assert response.status_code == 404
+
+    response, statements = count_statements(app, lambda: client.delete('/api/user/gear/2'))
+    assert response.status_code == 200
+    results.append(check_count('DELETE /api/user/gear/2', statements, 1 + VERSION_READ + VERSION_WRITE))
+
+    response, _ = count_statements(app, lambda: client.delete('/api/user/gear/2'))
+    assert response.status_code == 404
+
+    assert all(results)
+
+def test_bulk_query_counts():
+    """Bulk import resolves items in set-based queries; export is one query"""
+    app = make_app()
+    client = app.test_client()
+    results = []
+
+    with app.app_context():
+        from app.models.gear import Gear
+        gear = db.session.get(Gear, 4)
+        items = [1, 2, 3, {'gear_id': 5}, {'brand': gear.brand, 'name': gear.name}, 999999]
+
+    # One lookup for ids, one for (name, brand) pairs, one insert
+    response, statements = count_statements(app, lambda: client.post('/api/user/gear/bulk', json=items))
+    assert response.status_code == 200
+    assert response.get_json()['data']['added'] == 5
+    results.append(check_count('POST /api/user/gear/bulk', statements, 3 + VERSION_READ + VERSION_WRITE))
+
+    response, statements = count_statements(app, lambda: client.get('/api/user/gear/export').get_data())
+    assert len(response.splitlines()) == 5
+    results.append(check_count('GET /api/user/gear/export', statements, 1 + VERSION_READ))
+
+    assert all(results)
+
+def test_summary_query_counts():
+    """The summary is one grouped query, then served from cache until the collection changes"""
+    app = make_app()
+    client = app.test_client()
+    client.post('/api/user/gear/bulk', json=[1, 2, 3])
+    results = []
+
+    response, statements = count_statements(app, lambda: client.get('/api/user/gear/summary'))
+    assert response.get_json()['data']['count'] == 3
+    results.append(check_count('GET /api/user/gear/summary', statements, 1 + VERSION_READ))
+
+    _, statements = count_statements(app, lambda: client.get('/api/user/gear/summary'))
+    results.append(check_count('GET /api/user/gear/summary cached', statements, VERSION_READ))
+
+    client.delete('/api/user/gear/3')
+    response = client.get('/api/user/gear/summary')
+    assert response.get_json()['data']['count'] == 2
+
+    assert all(results)
+
+if __name__ == "__main__":
+    print("User Collection Query Count Check")
+    print("=" * 50)
+
+    test_collection_query_counts()
+    test_bulk_query_counts()
+    test_summary_query_counts()
+
+    print("\nAll collection endpoints are within their query budgets!")
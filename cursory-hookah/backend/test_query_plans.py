@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Check that the gear endpoint queries are answered from indexes rather than
+full table scans, using SQLite's EXPLAIN QUERY PLAN
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from app import create_app, db
+
+# Endpoint requests whose queries must not scan the whole gear table
+ENDPOINTS = [
+    '/api/gear/?category=bowl',
+    '/api/gear/?brand=Kaloud',
+    '/api/gear/?min_price=20&max_price=60',
+    '/api/gear/?limit=5',
+    '/api/gear/?sort=price&limit=5',
+    '/api/gear/?category=hookah&sort=price&limit=5',
+    '/api/gear/?brand=Kaloud&min_price=20',
+    '/api/gear/3',
+    '/api/gear/3/similar',
+    '/api/gear/search?q=kal lotus',
+    '/api/gear/stats/price',
+    '/api/gear/stats/price?brand=Kaloud',
+    '/api/recommendations/',
+]
+
+# Recommendation requests checked once the demo user owns some gear
+RECOMMENDATION_ENDPOINTS = [
+    '/api/recommendations/',
+    '/api/recommendations/category/bowl',
+    '/api/recommendations/category/hose',
+    '/api/recommendations/by-category',
+    '/api/recommendations/bundle?budget=500',
+]
+
+def capture_queries(app, action):
+    """Run ``action`` and return the (statement, parameters) it executed"""
+    queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            queries.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        action()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return queries
+
+def full_scans(app, statement, parameters):
+    """Return the plan lines that scan the gear table without an index"""
+    with app.app_context():
+        with db.engine.connect() as connection:
+            plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    return [row[-1] for row in plan if row[-1].strip() == 'SCAN gear']
+
+def check_queries(app, label, queries):
+    """Print the result for one endpoint and return True if every query used an index"""
+    ok = True
+    for statement, parameters in queries:
+        scans = full_scans(app, statement, parameters)
+        if scans:
+            ok = False
+            print(f"  ❌ {label}: full scan")
+            print(f"     {' '.join(statement.split())}")
+    if ok:
+        print(f"  ✅ {label}: {len(queries)} queries use indexes")
+    return ok
+
+def make_app():
+    """Create the app on a throwaway database seeded with the sample data.
+
+    The in-memory tag index, scoring matrix and similarity index are loaded
+    up front: building them reads the whole catalog once by design, and is
+    not part of any request's plan.
+    """
+    from app.services.scoring import gear_scorer
+    from app.services.similarity import similarity_index
+    from app.services.tag_index import tag_index
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'query_plans.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+    with app.app_context():
+        tag_index.owned_ids(None)
+        gear_scorer.recommend([], 1)
+        similarity_index.similar(0, 1)
+    return app
+
+def test_endpoint_query_plans():
+    """Every listed endpoint query uses an index"""
+    app = make_app()
+    client = app.test_client()
+
+    results = []
+    for url in ENDPOINTS:
+        queries = capture_queries(app, lambda: client.get(url))
+        results.append(check_queries(app, url, queries))
+
+    assert all(results)
+
+def test_recommendation_query_plans():
+    """Recommendations only fetch the ranked gear rows by primary key"""
+    app = make_app()
+    client = app.test_client()
+    client.post('/api/user/gear', json={'gear_id': 1})
+    client.post('/api/user/gear', json={'gear_id': 2})
+
+    results = []
+    for url in RECOMMENDATION_ENDPOINTS:
+        queries = capture_queries(app, lambda: client.get(url))
+        results.append(check_queries(app, url, queries))
+
+    assert all(results)
+
+def test_scraper_lookup_query_plan():
+    """The scraper's per-product (name, brand) lookup uses an index"""
+    from app.services.real_scrapers import RealHookahScraper
+
+    app = make_app()
+    product = {
+        'name': 'Kaloud Lotus Bowl',
+        'brand': 'Kaloud',
+        'category': 'bowl',
+        'price': 29.99
+    }
+
+    def save():
+        with app.app_context():
+            RealHookahScraper().save_products_to_db([product])
+
+    queries = capture_queries(app, save)
+    assert check_queries(app, 'save_products_to_db', queries)
+
+if __name__ == "__main__":
+    print("Gear Query Plan Check")
+    print("=" * 50)
+
+    test_endpoint_query_plans()
+    test_recommendation_query_plans()
+    test_scraper_lookup_query_plan()
+
+    print("\nAll checked queries use indexes!")
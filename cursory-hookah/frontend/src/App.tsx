@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { Gear, UserGear, FilterOptions } from './types';
+import { Gear, UserGear, FilterOptions, CollectionSummary } from './types';
 import { gearApi, userApi, recommendationsApi } from './services/api';
 import GearCard from './components/GearCard';
 import GearFilters from './components/GearFilters';
@@ -8,6 +8,7 @@ import ScraperManager from './components/ScraperManager';
 function App() {
   const [allGear, setAllGear] = useState<Gear[]>([]);
   const [userGear, setUserGear] = useState<UserGear[]>([]);
+  const [summary, setSummary] = useState<CollectionSummary | null>(null);
   const [recommendations, setRecommendations] = useState<Gear[]>([]);
   const [filters, setFilters] = useState<FilterOptions>({});
   const [loading, setLoading] = useState(true);
@@ -18,6 +19,10 @@ function App() {
     loadInitialData();
   }, []);
 
+  useEffect(() => {
+    loadSummary();
+  }, [userGear]);
+
   useEffect(() => {
     if (activeTab === 'browse') {
       loadGear();
@@ -49,6 +54,17 @@ function App() {
     }
   };
 
+  const loadSummary = async () => {
+    try {
+      const response = await userApi.getUserGearSummary();
+      if (response.success) {
+        setSummary(response.data);
+      }
+    } catch (error) {
+      console.error('Error loading collection summary:', error);
+    }
+  };
+
   const loadGear = async () => {
     try {
       setLoading(true);
@@ -202,6 +218,16 @@ function App() {
           {activeTab === 'collection' && (
             <div className="user-gear">
               <h3>My Hookah Collection</h3>
+              {summary && summary.count > 0 && (
+                <p style={{ color: '#666', marginBottom: '1rem' }}>
+                  {summary.count} items · ${summary.total_value.toFixed(2)} total
+                  {summary.average_rating !== null && ` · ${summary.average_rating.toFixed(1)}★ average`}
+                  {' · '}
+                  {Object.entries(summary.categories)
+                    .map(([category, totals]) => `${totals.count} ${category}`)
+                    .join(', ')}
+                </p>
+              )}
               {userGear.length === 0 ? (
                 <div className="empty-state">
                   <h3>Your collection is empty</h3>
@@ -15,17 +15,11 @@ const GearFilters: React.FC<GearFiltersProps> = ({ onFiltersChange, currentFilte
   useEffect(() => {
     const loadFilterOptions = async () => {
       try {
-        const [categoriesResponse, brandsResponse] = await Promise.all([
-          gearApi.getCategories(),
-          gearApi.getBrands()
-        ]);
+        const facetsResponse = await gearApi.getFacets();
 
-        if (categoriesResponse.success) {
-          setCategories(categoriesResponse.data);
-        }
-
-        if (brandsResponse.success) {
-          setBrands(brandsResponse.data);
+        if (facetsResponse.success) {
+          setCategories(facetsResponse.data.categories.map(facet => facet.name));
+          setBrands(facetsResponse.data.brands.map(facet => facet.name));
         }
       } catch (error) {
         console.error('Error loading filter options:', error);
@@ -1,6 +1,8 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { scraperApi } from '../services/api';
-import { Website, ScrapingStatus } from '../types';
+import { Website, ScrapingStatus, ScrapeJob } from '../types';
+
+const POLL_INTERVAL_MS = 1000;
 
 const ScraperManager: React.FC = () => {
   const [websites, setWebsites] = useState<Website[]>([]);
@@ -8,12 +10,19 @@ const ScraperManager: React.FC = () => {
   const [selectedWebsite, setSelectedWebsite] = useState<string>('all');
   const [selectedCategory, setSelectedCategory] = useState<string>('');
   const [isScraping, setIsScraping] = useState(false);
+  const [job, setJob] = useState<ScrapeJob | null>(null);
   const [scrapingResult, setScrapingResult] = useState<any>(null);
   const [error, setError] = useState<string | null>(null);
+  const pollTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
 
   useEffect(() => {
     loadWebsites();
     loadStatus();
+    return () => {
+      if (pollTimer.current) {
+        clearTimeout(pollTimer.current);
+      }
+    };
   }, []);
 
   const loadWebsites = async () => {
@@ -38,10 +47,42 @@ const ScraperManager: React.FC = () => {
     }
   };
 
+  const pollJob = async (jobId: string) => {
+    try {
+      const response = await scraperApi.getJob(jobId);
+      if (!response.success) {
+        setError(response.error || 'Failed to load scraping progress');
+        setIsScraping(false);
+        return;
+      }
+
+      const current = response.data;
+      setJob(current);
+      if (current.status === 'completed') {
+        setScrapingResult(current.result);
+        setIsScraping(false);
+        // Reload status after scraping
+        await loadStatus();
+      } else if (current.status === 'failed') {
+        setError(current.errors[current.errors.length - 1] || 'Scraping failed');
+        setIsScraping(false);
+      } else if (current.status === 'cancelled') {
+        setIsScraping(false);
+      } else {
+        pollTimer.current = setTimeout(() => pollJob(jobId), POLL_INTERVAL_MS);
+      }
+    } catch (error) {
+      setError('Failed to load scraping progress');
+      setIsScraping(false);
+      console.error('Scraping progress error:', error);
+    }
+  };
+
   const handleScraping = async () => {
     setIsScraping(true);
     setError(null);
     setScrapingResult(null);
+    setJob(null);
 
     try {
       const response = await scraperApi.triggerScraping(
@@ -50,17 +91,31 @@ const ScraperManager: React.FC = () => {
       );
       
       if (response.success) {
-        setScrapingResult(response.data);
-        // Reload status after scraping
-        await loadStatus();
+        setJob(response.data);
+        pollJob(response.data.id);
       } else {
         setError(response.error || 'Scraping failed');
+        setIsScraping(false);
       }
     } catch (error) {
       setError('Failed to start scraping');
-      console.error('Scraping error:', error);
-    } finally {
       setIsScraping(false);
+      console.error('Scraping error:', error);
+    }
+  };
+
+  const handleCancel = async () => {
+    if (!job) {
+      return;
+    }
+    try {
+      const response = await scraperApi.cancelJob(job.id);
+      if (response.success) {
+        setJob(response.data);
+      }
+    } catch (error) {
+      // 409: the job is already saving or finished, polling will catch up
+      console.error('Cancel error:', error);
     }
   };
 
@@ -139,8 +194,40 @@ const ScraperManager: React.FC = () => {
         >
           {isScraping ? '🔄 Scraping...' : '🚀 Start Scraping'}
         </button>
+        {isScraping && job && job.stage !== 'saving' && job.stage !== 'refreshing' && (
+          <button
+            className="btn btn-secondary"
+            onClick={handleCancel}
+            style={{ marginTop: '1rem', marginLeft: '0.5rem' }}
+          >
+            ✋ Cancel
+          </button>
+        )}
       </div>
 
+      {/* Progress Display */}
+      {job && (isScraping || job.status === 'cancelled') && (
+        <div style={{ marginBottom: '1rem', padding: '1rem', backgroundColor: '#f8f9fa', borderRadius: '8px' }}>
+          <h4>
+            {job.status === 'cancelled' ? '✋ Scraping cancelled' : `Scraping ${job.website}: ${job.stage || job.status}`}
+          </h4>
+          <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(150px, 1fr))', gap: '1rem' }}>
+            <div>
+              <strong>Pages:</strong> {job.progress.pages_fetched} / {job.progress.pages_total || '?'}
+            </div>
+            <div>
+              <strong>Products Parsed:</strong> {job.progress.products_parsed}
+            </div>
+            <div>
+              <strong>Saved:</strong> {job.progress.saved.added + job.progress.saved.updated}
+            </div>
+            <div>
+              <strong>Errors:</strong> {job.progress.errors}
+            </div>
+          </div>
+        </div>
+      )}
+
       {/* Error Display */}
       {error && (
         <div className="error">
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Gear, UserGear, ApiResponse, RecommendationsResponse, ScrapingStatus, FilterOptions, Website } from '../types';
+import { Gear, UserGear, ApiResponse, RecommendationsResponse, CategoryRecommendationsResponse, BulkAddResult, CollectionSummary, ScrapeJob, ScrapingStatus, FilterOptions, Website, Facets } from '../types';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5000/api';
 
@@ -28,6 +28,16 @@ export const gearApi = {
     return response.data;
   },
 
+  getSimilar: async (id: number, limit?: number): Promise<ApiResponse<Gear[]> & { similarity: number[] }> => {
+    const response = await api.get(`/gear/${id}/similar`, { params: { limit } });
+    return response.data;
+  },
+
+  getByIds: async (ids: number[]): Promise<ApiResponse<Gear[]> & { missing: number[] }> => {
+    const response = await api.post('/gear/batch', { ids });
+    return response.data;
+  },
+
   getCategories: async (): Promise<ApiResponse<string[]>> => {
     const response = await api.get('/gear/categories');
     return response.data;
@@ -37,6 +47,11 @@ export const gearApi = {
     const response = await api.get('/gear/brands');
     return response.data;
   },
+
+  getFacets: async (): Promise<ApiResponse<Facets>> => {
+    const response = await api.get('/gear/facets');
+    return response.data;
+  },
 };
 
 // User API calls
@@ -46,6 +61,11 @@ export const userApi = {
     return response.data;
   },
 
+  getUserGearSummary: async (): Promise<ApiResponse<CollectionSummary>> => {
+    const response = await api.get('/user/gear/summary');
+    return response.data;
+  },
+
   addGearToUser: async (gearId: number): Promise<ApiResponse<UserGear>> => {
     const response = await api.post('/user/gear', { gear_id: gearId });
     return response.data;
@@ -55,6 +75,18 @@ export const userApi = {
     const response = await api.delete(`/user/gear/${gearId}`);
     return response.data;
   },
+
+  bulkAddGearToUser: async (
+    items: Array<number | { brand: string; name: string }>
+  ): Promise<ApiResponse<BulkAddResult>> => {
+    const response = await api.post('/user/gear/bulk', { items });
+    return response.data;
+  },
+
+  exportUserGear: async (): Promise<string> => {
+    const response = await api.get('/user/gear/export', { responseType: 'text' });
+    return response.data;
+  },
 };
 
 // Recommendations API calls
@@ -68,11 +100,21 @@ export const recommendationsApi = {
     const response = await api.get(`/recommendations/category/${category}`);
     return response.data;
   },
+
+  getBundle: async (budget: number): Promise<ApiResponse<Gear[]> & { budget: number; total_price?: number }> => {
+    const response = await api.get('/recommendations/bundle', { params: { budget } });
+    return response.data;
+  },
+
+  getRecommendationsByCategory: async (limit?: number): Promise<CategoryRecommendationsResponse> => {
+    const response = await api.get('/recommendations/by-category', { params: { limit } });
+    return response.data;
+  },
 };
 
 // Scraper API calls
 export const scraperApi = {
-  triggerScraping: async (website?: string, category?: string): Promise<ApiResponse<{ products_found: number; website: string; category?: string; details?: any }>> => {
+  triggerScraping: async (website?: string, category?: string): Promise<ApiResponse<ScrapeJob>> => {
     const response = await api.post('/scraper/trigger', { 
       website: website || 'demo',
       category: category
@@ -80,6 +122,16 @@ export const scraperApi = {
     return response.data;
   },
 
+  getJob: async (jobId: string): Promise<ApiResponse<ScrapeJob>> => {
+    const response = await api.get(`/scraper/jobs/${jobId}`);
+    return response.data;
+  },
+
+  cancelJob: async (jobId: string): Promise<ApiResponse<ScrapeJob>> => {
+    const response = await api.post(`/scraper/jobs/${jobId}/cancel`);
+    return response.data;
+  },
+
   getStatus: async (): Promise<ApiResponse<ScrapingStatus>> => {
     const response = await api.get('/scraper/status');
     return response.data;
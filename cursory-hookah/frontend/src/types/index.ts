@@ -41,6 +41,28 @@ export interface RecommendationsResponse {
   user_gear_count: number;
 }
 
+export interface CategoryRecommendationsResponse {
+  success: boolean;
+  categories: Record<string, { data: Gear[]; count: number }>;
+  count: number;
+}
+
+export interface CollectionTotals {
+  count: number;
+  total_value: number;
+  average_rating: number | null;
+}
+
+export interface CollectionSummary extends CollectionTotals {
+  categories: Record<string, CollectionTotals>;
+}
+
+export interface BulkAddResult {
+  added: number;
+  already_owned: number;
+  not_found: { gear_ids: number[]; items: Array<{ brand: string; name: string }> };
+}
+
 export interface ScrapingStatus {
   total_products: number;
   categories: number;
@@ -49,6 +71,48 @@ export interface ScrapingStatus {
   last_updated: string;
 }
 
+export interface ScrapeJob {
+  id: string;
+  website: string;
+  category?: string | null;
+  max_pages: number;
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled';
+  stage: 'fetching' | 'saving' | 'refreshing' | null;
+  progress: {
+    pages_total: number;
+    pages_fetched: number;
+    products_parsed: number;
+    saved: { added: number; updated: number };
+    errors: number;
+  };
+  errors: string[];
+  result: {
+    products_found: number;
+    website: string;
+    category?: string | null;
+    details?: any;
+  } | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
+export interface Facet {
+  name: string;
+  count: number;
+  min_price?: number;
+  max_price?: number;
+}
+
+export interface Facets {
+  total: number;
+  min_price?: number;
+  max_price?: number;
+  categories: Facet[];
+  brands: Facet[];
+  websites: Facet[];
+}
+
 export interface Website {
   name: string;
   display_name: string;